@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Blog Page Benchmark for the Scenario 4 image
+Imports scenarios/04-missing-configmap/app/app.py with a temporary config and
+calls its WSGI app in-process (Flask test client, no sockets) to compare the
+index page rendered on every request (PAGE_CACHE off, the original behaviour)
+with the cached page, the precompressed copy and conditional GETs.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP = REPO_ROOT / "scenarios" / "04-missing-configmap" / "app" / "app.py"
+SOLUTION_CONFIG = {
+    "blog_name": "Kubernetes Learning Blog",
+    "tagline": "Master K8s troubleshooting, one scenario at a time",
+    "author": "K8s Workshop Team",
+    "theme": "tech-purple",
+    "max_posts_per_page": 15,
+    "comments_enabled": True,
+}
+
+def load_app(config_dir):
+    """Import the blog app against a config file in config_dir"""
+    config_path = Path(config_dir) / "blog.json"
+    config_path.write_text(json.dumps(SOLUTION_CONFIG))
+    os.environ["CONFIG_PATH"] = str(config_path)
+    spec = importlib.util.spec_from_file_location("blog_app", APP)
+    module = importlib.util.module_from_spec(spec)
+    # The app prints the loaded configuration; keep the report readable
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return module
+
+def run(client, headers, duration):
+    """Requests per second and response size for GET / with the given headers"""
+    count = 0
+    size = 0
+    status = None
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            response = client.get("/", headers=headers)
+            status, size = response.status_code, len(response.data)
+        count += 50
+    return count / (time.perf_counter() - start), status, size
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the Scenario 4 blog page with and without the page cache")
+    parser.add_argument("--duration", type=float, default=3, help="seconds per benchmark (default: 3)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark; the median is reported")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="bench-blog-") as config_dir:
+        blog = load_app(config_dir)
+        client = blog.app.test_client()
+        etag = client.get("/").headers["ETag"]
+
+        benchmarks = [
+            ("render per request (before)", False, {}),
+            ("cached", True, {}),
+            ("cached, gzip", True, {"Accept-Encoding": "gzip"}),
+            ("conditional GET (304)", True, {"If-None-Match": etag}),
+        ]
+        results = []
+        for name, cached, headers in benchmarks:
+            blog.PAGE_CACHE = cached
+            runs = [run(client, headers, args.duration) for _ in range(args.repeat)]
+            rps = statistics.median(rps for rps, _, _ in runs)
+            results.append({"benchmark": name, "rps": rps, "status": runs[-1][1], "bytes": runs[-1][2]})
+
+    baseline = results[0]["rps"]
+    print(f"{'Benchmark':<30} {'Req/s':>9} {'Per request':>12} {'Speedup':>8} {'Status':>7} {'Bytes':>7}")
+    for result in results:
+        print(f"{result['benchmark']:<30} {result['rps']:>9.0f} {1e6 / result['rps']:>10.1f}µs "
+              f"{result['rps'] / baseline:>7.1f}x {result['status']:>7} {result['bytes']:>7}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "duration": args.duration,
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
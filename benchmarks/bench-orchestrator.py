@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Benchmark for the K8s Workshop build and pull scripts
+Runs scripts/build-and-push-all.py and scripts/pull-all-images.py in
+--simulate mode (stand-in docker CLI, no daemon or registry) under different
+concurrency settings and reports end-to-end wall time and orchestrator
+overhead for the 12 SCENARIOS.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BUILD_SCRIPT = REPO_ROOT / "scripts" / "build-and-push-all.py"
+PULL_SCRIPT = REPO_ROOT / "scripts" / "pull-all-images.py"
+
+# Relative build/pull cost per image: Pillow and the kubernetes client make
+# memory-hog and rbac-app the slowest, init-wait and redis only re-tag bases
+LATENCY_PROFILE = {
+    "default": 1.0,
+    "memory-hog": 3.0,
+    "rbac-app": 2.0,
+    "init-wait": 0.3,
+    "redis": 0.3,
+}
+IMAGE_COUNT = 12
+
+def latency_setting(scale):
+    """SIM_DOCKER_LATENCY value for the profile scaled by scale"""
+    items = [f"{LATENCY_PROFILE['default'] * scale:g}"]
+    items += [f"{name}={seconds * scale:g}" for name, seconds in LATENCY_PROFILE.items() if name != "default"]
+    return ",".join(items)
+
+def ideal_seconds(scale, jobs):
+    """Lower bound for the wall time: total work spread perfectly over jobs"""
+    overrides = {k: v for k, v in LATENCY_PROFILE.items() if k != "default"}
+    total = (sum(overrides.values()) + (IMAGE_COUNT - len(overrides)) * LATENCY_PROFILE["default"]) * scale
+    return max(total / jobs, max(LATENCY_PROFILE.values()) * scale)
+
+def run_once(script, args, scale, output_lines):
+    """Run a script in simulation mode and return its wall time in seconds"""
+    with tempfile.TemporaryDirectory(prefix="bench-orchestrator-") as state_dir:
+        env = dict(
+            os.environ,
+            SIM_DOCKER_STATE=state_dir,
+            SIM_DOCKER_LATENCY=latency_setting(scale),
+            SIM_DOCKER_OUTPUT_LINES=str(output_lines),
+            SIM_DOCKER_BOOTSTRAP="0",
+            # Keep the prerequisite cache out of the user's home directory
+            HOME=state_dir,
+        )
+        cmd = [sys.executable, str(script), "--simulate", "--recheck", *args]
+        start = time.monotonic()
+        result = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.monotonic() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed:\n{result.stderr}")
+    return elapsed
+
+def measure(script, args, scale, output_lines, repeat):
+    """Median wall time over repeat runs"""
+    return statistics.median(run_once(script, args, scale, output_lines) for _ in range(repeat))
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the build/pull orchestration in simulation mode")
+    parser.add_argument("--jobs", default="1,2,4,8", help="comma-separated --jobs values (default: 1,2,4,8)")
+    parser.add_argument("--scale", type=float, default=0.5,
+                        help="seconds of simulated work for a default image (default: 0.5)")
+    parser.add_argument("--output-lines", type=int, default=50,
+                        help="progress lines each simulated build/pull prints (default: 50)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per configuration; the median is reported")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    jobs_list = [int(value) for value in args.jobs.split(",")]
+    results = []
+
+    print(f"Latency profile: {latency_setting(args.scale)} (seconds)")
+    print(f"Output lines per job: {args.output_lines}, repeats: {args.repeat}\n")
+
+    # Zero latency isolates what the scripts themselves cost: process spawning,
+    # output streaming, scheduling and state handling
+    overhead = measure(BUILD_SCRIPT, ["--force", "--jobs", "1"], 0, args.output_lines, args.repeat)
+    results.append({"benchmark": "build overhead (zero latency)", "jobs": 1, "seconds": overhead, "ideal": 0.0})
+
+    configurations = []
+    for jobs in jobs_list:
+        configurations.append(("build", jobs, ["--force", "--jobs", str(jobs)]))
+    for jobs in jobs_list:
+        configurations.append(("build --pipeline", jobs, ["--force", "--pipeline", "--jobs", str(jobs)]))
+    for jobs in jobs_list:
+        configurations.append(("build --split-platforms", jobs, ["--force", "--split-platforms", "--jobs", str(jobs)]))
+    for jobs in jobs_list:
+        configurations.append(("pull", jobs, ["--jobs", str(jobs)]))
+
+    for name, jobs, script_args in configurations:
+        script = PULL_SCRIPT if name == "pull" else BUILD_SCRIPT
+        seconds = measure(script, script_args, args.scale, args.output_lines, args.repeat)
+        results.append({"benchmark": name, "jobs": jobs, "seconds": seconds, "ideal": ideal_seconds(args.scale, jobs)})
+
+    print(f"{'Benchmark':<30} {'Jobs':>5} {'Wall':>9} {'Ideal':>9} {'Efficiency':>11}")
+    for result in results:
+        efficiency = f"{result['ideal'] / result['seconds'] * 100:.0f}%" if result["ideal"] else "-"
+        print(f"{result['benchmark']:<30} {result['jobs']:>5} {result['seconds']:>8.2f}s "
+              f"{result['ideal']:>8.2f}s {efficiency:>11}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "scale": args.scale,
+            "output_lines": args.output_lines,
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
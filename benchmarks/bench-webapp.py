@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Webapp Load Benchmark for the Scenario 3 image
+Starts scenarios/03-port-mismatch/app/app.py locally in each SERVER_MODE
+(Flask development server and asyncio/ASGI) and drives it with keep-alive
+HTTP/1.1 clients, reporting requests/sec and latency percentiles. Optionally
+holds extra idle keep-alive connections open during the run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP = REPO_ROOT / "scenarios" / "03-port-mismatch" / "app" / "app.py"
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def raise_open_file_limit():
+    """Every client connection needs a file descriptor"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            return soft
+    return hard
+
+def start_server(mode, port):
+    """Start the app in the given mode and wait until /health answers"""
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=mode)
+    process = subprocess.Popen([sys.executable, str(APP)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {process.returncode} (is Flask installed?)")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as sock:
+                sock.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+                if sock.recv(12).startswith(b"HTTP/1."):
+                    return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+class Client:
+    """One keep-alive HTTP/1.1 connection, reopened if the server closes it"""
+
+    def __init__(self, port, path):
+        self.port = port
+        self.request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+        self.reader = None
+        self.writer = None
+        self.connects = 0
+
+    async def get(self):
+        """Send one request and read the response; returns the status code"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+            self.connects += 1
+        self.writer.write(self.request)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip().lower()
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+            headers["connection"] = "close"
+        http10 = lines[0].startswith("HTTP/1.0")
+        if headers.get("connection") == "close" or (http10 and headers.get("connection") != "keep-alive"):
+            self.close()
+        return int(lines[0].split(" ")[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+async def hold_connections(port, count, batch=500):
+    """Open count keep-alive connections, each serving one request, and keep them idle"""
+    held = []
+
+    async def open_one():
+        client = Client(port, "/health")
+        try:
+            await asyncio.wait_for(client.get(), 30)
+            if client.writer is not None:
+                held.append(client)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            client.close()
+
+    for start in range(0, count, batch):
+        await asyncio.gather(*(open_one() for _ in range(min(batch, count - start))))
+    return held
+
+async def still_open(clients):
+    """How many held connections still answer a request without reconnecting"""
+    async def check(client):
+        connects = client.connects
+        try:
+            await asyncio.wait_for(client.get(), 30)
+            return client.connects == connects
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False
+    results = await asyncio.gather(*(check(client) for client in clients))
+    return sum(results)
+
+async def run_load(port, path, connections, duration, hold):
+    held = await hold_connections(port, hold) if hold else []
+
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        client = Client(port, path)
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                status = await client.get()
+            except (OSError, asyncio.IncompleteReadError):
+                client.close()
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        client.close()
+        return client.connects
+
+    start = time.perf_counter()
+    connects = await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    kept = await still_open(held) if held else 0
+    for client in held:
+        client.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "connects": sum(connects),
+        "held": len(held),
+        "held_after": kept,
+    }
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the Scenario 3 webapp serving modes")
+    parser.add_argument("--modes", default="flask,async", help="comma-separated SERVER_MODE values (default: flask,async)")
+    parser.add_argument("--connections", type=int, default=50, help="concurrent keep-alive clients (default: 50)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load per mode (default: 10)")
+    parser.add_argument("--path", default="/", help="request path (default: /)")
+    parser.add_argument("--hold", type=int, default=0,
+                        help="extra idle keep-alive connections held open during the run (default: 0)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    limit = raise_open_file_limit()
+    if args.connections + args.hold + 100 > limit:
+        print(f"⚠️  {args.connections + args.hold} connections need more than the {limit} open files allowed (ulimit -n)")
+
+    results = []
+    for mode in args.modes.split(","):
+        port = free_port()
+        print(f"Benchmarking {mode} on port {port} ({args.connections} clients, {args.duration:g}s"
+              f"{f', {args.hold} held connections' if args.hold else ''})...", flush=True)
+        server = start_server(mode, port)
+        try:
+            result = asyncio.run(run_load(port, args.path, args.connections, args.duration, args.hold))
+        finally:
+            stop_server(server)
+        result["mode"] = mode
+        results.append(result)
+
+    print(f"\n{'Mode':<8} {'Requests':>9} {'Req/s':>9} {'p50':>9} {'p99':>9} {'Errors':>7} {'Connects':>9} {'Held':>13}")
+    for result in results:
+        held = f"{result['held_after']}/{args.hold}" if args.hold else "-"
+        print(f"{result['mode']:<8} {result['requests']:>9} {result['rps']:>9.0f} {result['p50_ms']:>7.2f}ms "
+              f"{result['p99_ms']:>7.2f}ms {result['errors']:>7} {result['connects']:>9} {held:>13}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "connections": args.connections,
+            "duration": args.duration,
+            "path": args.path,
+            "hold": args.hold,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -2,33 +2,508 @@
 """
 Kubernetes Masterclass - Scenario 1: CrashLoopBackOff
 A simple Python app that requires an environment variable to run.
+
+Optional settings (for using the app as a log source in load tests):
+  HEARTBEAT_INTERVAL  seconds between heartbeats (default: 10, 0 = as fast as allowed)
+  LOG_FORMAT          "text" (default) or "json" (one JSON object per line)
+  LOG_RATE_LIMIT      maximum log lines per second (default: 0 = unlimited)
+  LOG_BATCH_SIZE      lines written to stdout in one write (default: 512)
+  LOG_FLUSH_INTERVAL  maximum seconds a line waits before being written (default: 0.1)
+  LOG_QUEUE_SIZE      lines buffered before new ones are dropped (default: 10000)
+
+Before exiting, the app writes a one-line JSON diagnostic (exit reason and
+startup phase timings) to the Kubernetes termination message path, so
+`kubectl describe pod` shows why it stopped without fetching logs.
+  TERMINATION_MESSAGE_PATH  where to write it (default: /dev/termination-log)
+
+Config retry mode (opt-in; by default a missing config still exits with code 1):
+  CONFIG_RETRY          "true" to keep running and re-check the config instead of exiting
+  REQUIRED_CONFIG_FILE  file (e.g. a mounted ConfigMap key) read when REQUIRED_CONFIG is unset
+  CONFIG_RETRY_INITIAL  seconds before the first re-check (default: 1)
+  CONFIG_RETRY_MAX      upper bound for the doubling delay between re-checks (default: 10)
+  HEALTH_PORT           port for /healthz and /readyz; /readyz returns 503 until the
+                        config is loaded (default: 8080, 0 = disabled)
+
+Synthetic workload settings (to simulate misbehaving pods at scale):
+  WORKLOAD_IMPORT_SECONDS    extra time spent "importing" before main() (default: 0)
+  WORKLOAD_CPU_SECONDS       CPU-bound initialization after the config check (default: 0)
+  WORKLOAD_MEMORY_MB         memory allocated and touched at startup, held until exit (default: 0)
+  WORKLOAD_EXIT_AFTER        exit after N heartbeats, or a random N in MIN-MAX (default: never)
+  WORKLOAD_EXIT_PROBABILITY  chance of exiting after each heartbeat (default: 0)
+  WORKLOAD_EXIT_CODES        exit codes to use, e.g. "1" or "1,2,137" (default: 1)
+  WORKLOAD_STATE_FILE        file (e.g. on an emptyDir) counting restarts; exit codes are
+                             then used in order instead of at random
+  WORKLOAD_SEED              seed for the random choices (default: random per process)
 """
 
+import hashlib
+import json
 import os
+import queue
+import random
+import signal
 import sys
+import threading
 import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-def main():
-    print(f"[{datetime.now()}] Starting application...")
+# Kubernetes shows at most 4096 bytes of the termination message
+TERMINATION_MESSAGE_LIMIT = 4096
 
-    # Check for required environment variable
-    required_config = os.getenv('REQUIRED_CONFIG')
+def process_age():
+    """Seconds since this process was started, or None if unknown (non-Linux)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 is the start time in clock ticks since boot; the command
+            # name in field 2 may contain spaces, so count from its ')'
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 0.0)
 
-    if not required_config:
-        print("ERROR: REQUIRED_CONFIG environment variable is not set!", file=sys.stderr)
-        print("Application cannot start without proper configuration.", file=sys.stderr)
-        sys.exit(1)
+class StartupTimer:
+    """Durations of the startup phases, in milliseconds"""
 
-    print(f"[{datetime.now()}] Configuration loaded: {required_config}")
-    print(f"[{datetime.now()}] Application started successfully!")
+    def __init__(self):
+        age = process_age()
+        # Interpreter start-up and imports, up to the first line of main()
+        self.phases = {'interpreter': None if age is None else round(age * 1000, 1)}
+        self.started = time.monotonic()
+        self.last = self.started
 
-    # Keep the application running
-    counter = 0
+    def mark(self, phase):
+        """End the current phase under the given name"""
+        now = time.monotonic()
+        self.phases[phase] = round((now - self.last) * 1000, 3)
+        self.last = now
+
+    def summary(self):
+        return ', '.join(f"{phase} {'?' if ms is None else f'{ms}ms'}" for phase, ms in self.phases.items())
+
+def write_termination_message(reason, exit_code, detail, timer, heartbeats=0):
+    """Write a compact JSON diagnostic to the termination message path"""
+    path = os.getenv('TERMINATION_MESSAGE_PATH', '/dev/termination-log')
+    # Outside Kubernetes the file does not exist; don't create one in /dev
+    if 'TERMINATION_MESSAGE_PATH' not in os.environ and not os.path.exists(path):
+        return
+    record = {
+        'reason': reason,
+        'exit_code': exit_code,
+        'detail': detail,
+        'startup_ms': timer.phases,
+        'uptime_s': round(process_age() or time.monotonic() - timer.started, 3),
+        'heartbeats': heartbeats,
+    }
+    message = json.dumps(record, separators=(',', ':'))
+    if len(message) > TERMINATION_MESSAGE_LIMIT:
+        record['detail'] = detail[:max(len(detail) - (len(message) - TERMINATION_MESSAGE_LIMIT) - 3, 0)] + '...'
+        message = json.dumps(record, separators=(',', ':'))
+    try:
+        with open(path, 'w') as f:
+            f.write(message)
+    except OSError:
+        pass
+
+def env_flag(name):
+    """Read a boolean setting from the environment"""
+    return os.getenv(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+def env_float(name, default):
+    """Read a numeric setting from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+# Simulated slow imports count towards the interpreter start-up phase
+time.sleep(max(env_float('WORKLOAD_IMPORT_SECONDS', 0), 0))
+
+class RateLimiter:
+    """Token bucket allowing `rate` events per second (0 = unlimited)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        # Allow bursts of up to one second's worth of events, but always room
+        # for one event, or rates below 1/s would never fill the bucket
+        self.capacity = max(rate, 1)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def acquire(self, stop):
+        """Block until the next event is allowed; False if stop was set first"""
+        if self.rate <= 0:
+            return not stop.is_set()
+        while not stop.is_set():
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            stop.wait((1 - self.tokens) / self.rate)
+        return False
+
+class LogEmitter:
+    """Queue-backed log writer
+
+    The caller only puts (timestamp, level, message, fields) on a queue. A
+    background thread formats the lines and writes them in batches, so a slow
+    stdout never stalls the heartbeat loop. When the queue is full, new lines
+    are dropped and counted instead of blocking.
+    """
+
+    def __init__(self, log_format='text', batch_size=512, flush_interval=0.1, queue_size=10000):
+        self.json = log_format == 'json'
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max(int(queue_size), 1))
+        self.emitted = 0
+        self.dropped = 0
+        self.started = time.monotonic()
+        self.window_start = self.started
+        self.window_count = 0
+        self.rate = 0.0
+        self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def emit(self, message, level='info', stream=1, **fields):
+        """Queue a log line; stream 1 is stdout, 2 is stderr"""
+        try:
+            self.queue.put_nowait((time.time(), level, message, fields, stream))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5):
+        """Write everything still queued and stop the writer, waiting at most `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        try:
+            self.queue.put((None, None, None, None, None), timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(max(deadline - time.monotonic(), 0))
+
+    def _format(self, timestamp, level, message, fields, stream):
+        if not self.json:
+            # Plain text keeps the original output: timestamps on stdout only
+            return message if stream == 2 else f"[{datetime.fromtimestamp(timestamp)}] {message}"
+        record = {
+            'ts': datetime.fromtimestamp(timestamp).isoformat(timespec='microseconds'),
+            'level': level,
+            'msg': message,
+        }
+        record.update(fields)
+        # Throughput counters, as of the moment the line is written
+        record['emitted'] = self.emitted
+        record['dropped'] = self.dropped
+        record['lines_per_sec'] = round(self.rate, 1)
+        return json.dumps(record, separators=(',', ':'))
+
+    def _count(self, lines):
+        self.emitted += lines
+        self.window_count += lines
+        now = time.monotonic()
+        if now - self.window_start >= 1:
+            self.rate = self.window_count / (now - self.window_start)
+            self.window_start = now
+            self.window_count = 0
+
+    def _run(self):
+        streams = {1: sys.stdout.buffer, 2: sys.stderr.buffer}
+        stopping = False
+        while not stopping:
+            batch = {1: [], 2: []}
+            deadline = time.monotonic() + self.flush_interval
+            count = 0
+            while count < self.batch_size:
+                try:
+                    timeout = max(deadline - time.monotonic(), 0)
+                    timestamp, level, message, fields, stream = self.queue.get(timeout=timeout if count else None)
+                except queue.Empty:
+                    break
+                if timestamp is None:
+                    stopping = True
+                    break
+                self._count(1)
+                batch[stream].append(self._format(timestamp, level, message, fields, stream))
+                count += 1
+
+            for stream, lines in batch.items():
+                if lines:
+                    # A closed pipe must not kill the writer: the queue would fill
+                    # up and close() would wait forever, so count and move on
+                    try:
+                        streams[stream].write(('\n'.join(lines) + '\n').encode())
+                        streams[stream].flush()
+                    except OSError:
+                        self.emitted -= len(lines)
+                        self.dropped += len(lines)
+
+def load_config():
+    """REQUIRED_CONFIG from the environment, else from REQUIRED_CONFIG_FILE
+
+    Returns (value, source); value is empty if neither is set.
+    """
+    value = os.getenv('REQUIRED_CONFIG')
+    if value:
+        return value, 'environment'
+    path = os.getenv('REQUIRED_CONFIG_FILE')
+    if path:
+        try:
+            with open(path) as f:
+                return f.read().strip(), path
+        except OSError:
+            pass
+    return '', None
+
+class HealthServer:
+    """Tiny HTTP server for liveness and readiness probes
+
+    /healthz answers 200 as long as the process is alive; /readyz answers 503
+    until the config has been loaded, so a waiting pod is kept out of Service
+    endpoints instead of being restarted.
+    """
+
+    def __init__(self, port):
+        self.ready = False
+        self.status = {'ready': False, 'reason': 'starting'}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/healthz':
+                    code, body = 200, {'status': 'alive'}
+                elif self.path == '/readyz':
+                    code, body = (200 if server.ready else 503), server.status
+                else:
+                    code, body = 404, {'error': 'not found'}
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Probes every few seconds would drown out the application log
+                pass
+
+        self.httpd = ThreadingHTTPServer(('', port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='health', daemon=True)
+        self.thread.start()
+
+    def set_status(self, ready, **status):
+        self.status = {'ready': ready, **status}
+        self.ready = ready
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def wait_for_config(emitter, stop, health, initial, maximum):
+    """Re-check the config with exponential backoff until it is set or stop is set
+
+    Returns (value, source), or ('', None) if stopped first.
+    """
+    delay = max(initial, 0.1)
+    attempt = 1
     while True:
+        emitter.emit(f"Waiting for REQUIRED_CONFIG (attempt {attempt}, next check in {delay:g}s)",
+                     level='warning', stream=2, attempt=attempt, retry_in=delay)
+        if health:
+            health.set_status(False, reason='MissingConfig', attempts=attempt, retry_in=delay)
+        if stop.wait(delay):
+            return '', None
+        value, source = load_config()
+        if value:
+            return value, source
+        attempt += 1
+        delay = min(delay * 2, max(maximum, initial))
+
+class SyntheticWorkload:
+    """Start-up cost and exit behaviour configured through WORKLOAD_* variables"""
+
+    def __init__(self, emitter):
+        self.emitter = emitter
+        seed = os.getenv('WORKLOAD_SEED')
+        self.rng = random.Random(seed) if seed is not None else random.Random()
+        self.cpu_seconds = env_float('WORKLOAD_CPU_SECONDS', 0)
+        self.memory_mb = int(env_float('WORKLOAD_MEMORY_MB', 0))
+        self.exit_probability = env_float('WORKLOAD_EXIT_PROBABILITY', 0)
+        self.exit_codes = self._parse_exit_codes()
+        self.state_file = os.getenv('WORKLOAD_STATE_FILE')
+        self.restarts = self._count_start()
+        self.exit_after = self._parse_exit_after()
+        self.ballast = None
+
+    def _warn(self, name, value, fallback):
+        self.emitter.emit(f"Ignoring invalid {name}={value!r}; using {fallback}", level='warning', stream=2)
+
+    def _parse_exit_codes(self):
+        """WORKLOAD_EXIT_CODES as a list of integers, [1] if unset or invalid"""
+        value = os.getenv('WORKLOAD_EXIT_CODES', '1')
+        try:
+            return [int(code) for code in value.split(',') if code.strip()] or [1]
+        except ValueError:
+            self._warn('WORKLOAD_EXIT_CODES', value, '1')
+            return [1]
+
+    def _parse_exit_after(self):
+        """Heartbeats before exiting, drawn from WORKLOAD_EXIT_AFTER; None if unset or invalid"""
+        value = os.getenv('WORKLOAD_EXIT_AFTER', '')
+        low, _, high = value.partition('-')
+        if not low.strip():
+            return None
+        try:
+            low, high = int(low), int(high or low)
+        except ValueError:
+            self._warn('WORKLOAD_EXIT_AFTER', value, 'never')
+            return None
+        # Accept a reversed range such as 5-3
+        return self.rng.randint(min(low, high), max(low, high))
+
+    def _count_start(self):
+        """Increment and return the number of earlier starts recorded in the state file"""
+        if not self.state_file:
+            return 0
+        try:
+            with open(self.state_file) as f:
+                restarts = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            restarts = 0
+        try:
+            with open(self.state_file, 'w') as f:
+                f.write(str(restarts + 1))
+        except OSError:
+            pass
+        return restarts
+
+    def warm_up(self, timer):
+        """Burn CPU and touch memory, timing each as a startup phase"""
+        if self.cpu_seconds > 0:
+            deadline = time.monotonic() + self.cpu_seconds
+            digest = b''
+            while time.monotonic() < deadline:
+                for _ in range(1000):
+                    digest = hashlib.sha256(digest).digest()
+            timer.mark('cpu_init')
+        if self.memory_mb > 0:
+            self.ballast = bytearray(self.memory_mb * 1024 * 1024)
+            # Write one byte per page so the memory is resident, not just reserved
+            for offset in range(0, len(self.ballast), 4096):
+                self.ballast[offset] = 1
+            timer.mark('memory_warmup')
+
+    def should_exit(self, heartbeat):
+        """True if the process should exit after this heartbeat"""
+        if self.exit_after is not None and heartbeat >= self.exit_after:
+            return True
+        return self.exit_probability > 0 and self.rng.random() < self.exit_probability
+
+    def exit_code(self):
+        """Next exit code: in order of restarts with a state file, otherwise at random"""
+        if self.state_file:
+            return self.exit_codes[self.restarts % len(self.exit_codes)]
+        return self.rng.choice(self.exit_codes)
+
+def run_heartbeats(emitter, interval, limiter, stop, workload=None):
+    """Emit heartbeats every `interval` seconds, within the rate limit, until stop is set
+
+    Returns (heartbeats, True if the workload asked to exit).
+    """
+    counter = 0
+    next_beat = time.monotonic()
+    while not stop.is_set():
+        if not limiter.acquire(stop):
+            break
         counter += 1
-        print(f"[{datetime.now()}] Application is running... (heartbeat #{counter})")
-        time.sleep(10)
+        emitter.emit(f"Application is running... (heartbeat #{counter})", heartbeat=counter)
+        if workload and workload.should_exit(counter):
+            return counter, True
+        if interval > 0:
+            next_beat += interval
+            stop.wait(max(next_beat - time.monotonic(), 0))
+    return counter, False
+
+def main():
+    timer = StartupTimer()
+    emitter = LogEmitter(
+        os.getenv('LOG_FORMAT', 'text').lower(),
+        env_float('LOG_BATCH_SIZE', 512),
+        env_float('LOG_FLUSH_INTERVAL', 0.1),
+        env_float('LOG_QUEUE_SIZE', 10000),
+    )
+    # Kubernetes stops containers with SIGTERM; stop the loop (rather than
+    # raising mid-write) so queued lines are still written
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    heartbeats = 0
+    health = None
+    try:
+        emitter.emit("Starting application...")
+
+        retry = env_flag('CONFIG_RETRY')
+        port = int(env_float('HEALTH_PORT', 8080))
+        if retry and port > 0:
+            health = HealthServer(port)
+        # Log writer, signal handler and probe server
+        timer.mark('setup')
+
+        # Check for required environment variable (or mounted config file)
+        required_config, source = load_config()
+        timer.mark('config_load')
+
+        valid = bool(required_config)
+        if not valid and not retry:
+            emitter.emit("ERROR: REQUIRED_CONFIG environment variable is not set!", level='error', stream=2)
+            emitter.emit("Application cannot start without proper configuration.", level='error', stream=2)
+            write_termination_message('MissingConfig', 1, 'REQUIRED_CONFIG environment variable is not set', timer)
+            sys.exit(1)
+
+        if not valid:
+            # Retry in-process: once the config appears, recovery takes seconds
+            # instead of waiting out kubelet's CrashLoopBackOff delay
+            emitter.emit("REQUIRED_CONFIG is not set; retrying instead of exiting (CONFIG_RETRY)",
+                         level='warning', stream=2)
+            required_config, source = wait_for_config(emitter, stop, health,
+                                                      env_float('CONFIG_RETRY_INITIAL', 1),
+                                                      env_float('CONFIG_RETRY_MAX', 10))
+            timer.mark('config_wait')
+            if not required_config:
+                write_termination_message('Stopped', 0, 'received SIGTERM while waiting for REQUIRED_CONFIG', timer)
+                return
+
+        emitter.emit(f"Configuration loaded: {required_config}", source=source)
+
+        workload = SyntheticWorkload(emitter)
+        workload.warm_up(timer)
+
+        emitter.emit("Application started successfully!")
+        if health:
+            health.set_status(True, reason='ConfigLoaded', source=source)
+        emitter.emit(f"Startup phases: {timer.summary()}", startup_ms=timer.phases)
+
+        # Keep the application running
+        heartbeats, exiting = run_heartbeats(emitter, env_float('HEARTBEAT_INTERVAL', 10),
+                                             RateLimiter(env_float('LOG_RATE_LIMIT', 0)), stop, workload)
+        if exiting:
+            code = workload.exit_code()
+            emitter.emit(f"Synthetic exit after {heartbeats} heartbeats with code {code}", level='error', stream=2)
+            write_termination_message('SyntheticExit', code, f"start #{workload.restarts + 1}", timer, heartbeats)
+            sys.exit(code)
+        write_termination_message('Stopped', 0, 'received SIGTERM', timer, heartbeats)
+    except Exception as e:
+        emitter.emit(f"ERROR: {type(e).__name__}: {e}", level='error', stream=2)
+        write_termination_message('Crashed', 1, f"{type(e).__name__}: {e}", timer, heartbeats)
+        sys.exit(1)
+    finally:
+        if health:
+            health.close()
+        emitter.close()
 
 if __name__ == "__main__":
     main()
@@ -2,32 +2,455 @@
 """
 Kubernetes Masterclass - Scenario 3: Port Mismatch
 A simple Flask web application for testing service port configuration.
+
+Serving modes (SERVER_MODE):
+  flask  Flask's development server (default)
+  async  asyncio HTTP/1.1 server running the ASGI app below; holds tens of
+         thousands of keep-alive connections, for Service/Ingress load tests.
+         The ASGI app can also be served by any ASGI server (`uvicorn app:asgi_app`).
+
+Synthetic workload endpoints (for HPA and load-balancer experiments):
+  /cpu?ms=100                  burn this many milliseconds of CPU time
+  /memory?mb=50&hold=5         allocate (and touch) memory, hold it for some seconds;
+                               retain=1 keeps it until /memory?release=1
+  /latency?ms=100&dist=normal  sleep for a fixed, uniform, normal or exponential delay
+  /payload?kb=512              return a response body of the given size
+Limits: MAX_CPU_MS (10000), MAX_MEMORY_MB (1024), MAX_LATENCY_MS (60000), MAX_PAYLOAD_MB (100)
+
+Async mode settings:
+  KEEPALIVE_TIMEOUT  seconds an idle keep-alive connection is kept open (default: 75)
+  LISTEN_BACKLOG     pending connections queued by the kernel (default: 4096)
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from datetime import datetime
+from urllib.parse import parse_qsl
+import asyncio
+import hashlib
+import json
 import os
+import random
+import resource
+import socket
+import threading
+import time
 
 app = Flask(__name__)
 
-@app.route('/')
-def home():
-    return jsonify({
+def home_payload():
+    return {
         "status": "success",
         "message": "Welcome to the Kubernetes Masterclass!",
         "scenario": "03 - Port Mismatch",
         "timestamp": datetime.now().isoformat(),
         "pod_name": os.getenv('HOSTNAME', 'unknown')
-    })
+    }
 
-@app.route('/health')
-def health():
-    return jsonify({
+def health_payload():
+    return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat()
+    }
+
+# Synthetic workload, shared by the Flask and ASGI apps
+
+LIMITS = {
+    'cpu_ms': float(os.getenv('MAX_CPU_MS', 10000)),
+    'memory_mb': float(os.getenv('MAX_MEMORY_MB', 1024)),
+    'latency_ms': float(os.getenv('MAX_LATENCY_MS', 60000)),
+    'payload_kb': float(os.getenv('MAX_PAYLOAD_MB', 100)) * 1024,
+}
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'exponential')
+PAYLOAD_CHUNK = random.Random(3).randbytes(64 * 1024)  # incompressible filler
+
+# Allocations kept with retain=1, until /memory?release=1
+retained_memory = []
+retained_lock = threading.Lock()
+
+class InvalidParameter(ValueError):
+    """A query parameter that is missing, malformed or over its limit (400)"""
+
+def number_arg(args, name, default, maximum):
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise InvalidParameter(f"'{name}' must be a number")
+    if not 0 <= number <= maximum:
+        raise InvalidParameter(f"'{name}' must be between 0 and {maximum:g}")
+    return number
+
+def flag_arg(args, name):
+    return args.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+def burn_cpu(ms):
+    """Hash in a loop until this thread has used ms milliseconds of CPU time"""
+    started = time.perf_counter()
+    deadline = time.thread_time() + ms / 1000
+    digest = b''
+    hashes = 0
+    while time.thread_time() < deadline:
+        for _ in range(100):
+            digest = hashlib.sha256(digest).digest()
+        hashes += 100
+    return {
+        "status": "success",
+        "cpu_ms": ms,
+        "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+        "hashes": hashes,
+    }
+
+def allocate_memory(mb):
+    """Allocate mb megabytes and write every page, so it counts towards the working set"""
+    block = bytearray(int(mb * 1024 * 1024))
+    for offset in range(0, len(block), 4096):
+        block[offset] = 1
+    return block
+
+def retained_mb():
+    with retained_lock:
+        return round(sum(len(block) for block in retained_memory) / 1024 / 1024, 3)
+
+def memory_payload(block, hold, retain):
+    if retain:
+        with retained_lock:
+            retained_memory.append(block)
+    return {
+        "status": "success",
+        "allocated_mb": round(len(block) / 1024 / 1024, 3),
+        "held_s": hold,
+        "retained_mb": retained_mb(),
+    }
+
+def release_memory():
+    freed = retained_mb()
+    with retained_lock:
+        retained_memory.clear()
+    return {"status": "success", "released_mb": freed, "retained_mb": 0}
+
+def memory_args(args):
+    """(mb, hold seconds, retain) for /memory"""
+    mb = number_arg(args, 'mb', 10, LIMITS['memory_mb'])
+    hold = number_arg(args, 'hold', 0, LIMITS['latency_ms'] / 1000)
+    return mb, hold, flag_arg(args, 'retain')
+
+def latency_seconds(args):
+    """Sample a delay: ms is the fixed value or mean, jitter the spread (uniform) or standard deviation (normal)"""
+    dist = args.get('dist', 'fixed')
+    if dist not in LATENCY_DISTRIBUTIONS:
+        raise InvalidParameter(f"'dist' must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+    ms = number_arg(args, 'ms', 100, LIMITS['latency_ms'])
+    jitter = number_arg(args, 'jitter', ms / 4 if dist == 'normal' else ms, LIMITS['latency_ms'])
+    if dist == 'uniform':
+        delay = random.uniform(ms - jitter, ms + jitter)
+    elif dist == 'normal':
+        delay = random.gauss(ms, jitter)
+    elif dist == 'exponential':
+        delay = random.expovariate(1 / ms) if ms else 0
+    else:
+        delay = ms
+    return dist, ms, min(max(delay, 0), LIMITS['latency_ms']) / 1000
+
+def latency_payload(dist, ms, delay):
+    return {"status": "success", "dist": dist, "ms": ms, "slept_ms": round(delay * 1000, 3)}
+
+def payload_size(args):
+    return int(number_arg(args, 'kb', 1, LIMITS['payload_kb']) * 1024)
+
+def payload_chunks(size):
+    while size > 0:
+        chunk = PAYLOAD_CHUNK[:size]
+        size -= len(chunk)
+        yield chunk
+
+@app.route('/')
+def home():
+    return jsonify(home_payload())
+
+@app.route('/health')
+def health():
+    return jsonify(health_payload())
+
+@app.route('/cpu')
+def cpu():
+    return jsonify(burn_cpu(number_arg(request.args, 'ms', 100, LIMITS['cpu_ms'])))
+
+@app.route('/memory')
+def memory():
+    if flag_arg(request.args, 'release'):
+        return jsonify(release_memory())
+    mb, hold, retain = memory_args(request.args)
+    block = allocate_memory(mb)
+    time.sleep(hold)
+    return jsonify(memory_payload(block, hold, retain))
+
+@app.route('/latency')
+def latency():
+    dist, ms, delay = latency_seconds(request.args)
+    time.sleep(delay)
+    return jsonify(latency_payload(dist, ms, delay))
+
+@app.route('/payload')
+def payload():
+    size = payload_size(request.args)
+    return Response(payload_chunks(size), mimetype='application/octet-stream',
+                    headers={'Content-Length': str(size)})
+
+@app.errorhandler(InvalidParameter)
+def invalid_parameter(error):
+    return jsonify({"status": "error", "message": str(error)}), 400
+
+# ASGI app with the same routes as the Flask app
+# Handlers return (status, JSON payload), or (status, (content type, size, chunks)) for raw bodies
+
+async def asgi_home(args):
+    return 200, home_payload()
+
+async def asgi_health(args):
+    return 200, health_payload()
+
+async def asgi_cpu(args):
+    ms = number_arg(args, 'ms', 100, LIMITS['cpu_ms'])
+    # Off the event loop, so other connections keep being served between GIL switches
+    return 200, await asyncio.to_thread(burn_cpu, ms)
+
+async def asgi_memory(args):
+    if flag_arg(args, 'release'):
+        return 200, release_memory()
+    mb, hold, retain = memory_args(args)
+    block = await asyncio.to_thread(allocate_memory, mb)
+    await asyncio.sleep(hold)
+    return 200, memory_payload(block, hold, retain)
+
+async def asgi_latency(args):
+    dist, ms, delay = latency_seconds(args)
+    await asyncio.sleep(delay)
+    return 200, latency_payload(dist, ms, delay)
+
+async def asgi_payload(args):
+    size = payload_size(args)
+    return 200, ('application/octet-stream', size, payload_chunks(size))
+
+ASGI_ROUTES = {
+    '/': asgi_home,
+    '/health': asgi_health,
+    '/cpu': asgi_cpu,
+    '/memory': asgi_memory,
+    '/latency': asgi_latency,
+    '/payload': asgi_payload,
+}
+
+def to_json(payload):
+    """Encode like Flask's jsonify: compact, sorted keys, trailing newline"""
+    return (json.dumps(payload, separators=(',', ':'), sort_keys=True) + '\n').encode()
+
+async def asgi_app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    route = ASGI_ROUTES.get(scope['path'])
+    if route is None:
+        status, payload = 404, {"status": "error", "message": "Not Found"}
+    elif scope['method'] not in ('GET', 'HEAD'):
+        status, payload = 405, {"status": "error", "message": "Method Not Allowed"}
+    else:
+        try:
+            status, payload = await route(dict(parse_qsl(scope['query_string'].decode('latin-1'))))
+        except InvalidParameter as e:
+            status, payload = 400, {"status": "error", "message": str(e)}
+
+    if isinstance(payload, dict):
+        body = to_json(payload)
+        content_type, size, chunks = 'application/json', len(body), [body]
+    else:
+        content_type, size, chunks = payload
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(size).encode())],
     })
+    if scope['method'] == 'HEAD':
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    # Send the last chunk without more_body, so small responses take a single send
+    chunks = iter(chunks)
+    chunk = next(chunks, b'')
+    for following in chunks:
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        chunk = following
+    await send({'type': 'http.response.body', 'body': chunk})
+
+# Minimal asyncio HTTP/1.1 server for the ASGI app
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 501: 'Not Implemented'}
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+class HTTPConnection:
+    """One client connection: parse requests, run the ASGI app, keep alive"""
+
+    def __init__(self, application, reader, writer, keepalive_timeout):
+        self.app = application
+        self.reader = reader
+        self.writer = writer
+        self.keepalive_timeout = keepalive_timeout
+        self.server = writer.get_extra_info('sockname')[:2]
+        self.client = (writer.get_extra_info('peername') or ('', 0))[:2]
+
+    async def serve(self):
+        try:
+            while await self.handle_request():
+                pass
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+
+    async def handle_request(self):
+        """Serve one request; returns True if the connection stays open"""
+        try:
+            head = await asyncio.wait_for(self.reader.readuntil(b'\r\n\r\n'), self.keepalive_timeout)
+        except asyncio.LimitOverrunError:
+            await self.error(400)
+            return False
+
+        try:
+            request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ')
+            headers = [(name.strip().lower().encode('latin-1'), value.strip().encode('latin-1'))
+                       for name, value in (line.split(':', 1) for line in header_lines)]
+        except ValueError:
+            await self.error(400)
+            return False
+
+        fields = dict(headers)
+        connection = fields.get(b'connection', b'').lower()
+        keep_alive = connection != b'close' if version == 'HTTP/1.1' else connection == b'keep-alive'
+
+        # Only Content-Length framed bodies are supported; a body we cannot
+        # frame would be read as the next request, so refuse and close
+        if b'transfer-encoding' in fields:
+            await self.error(501)
+            return False
+        content_length = fields.get(b'content-length', b'0')
+        if not content_length.isdigit():
+            await self.error(400)
+            return False
+        length = int(content_length)
+        if length > MAX_BODY_BYTES:
+            await self.error(413)
+            return False
+        body = await self.reader.readexactly(length) if length else b''
+
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version[5:],
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'server': self.server,
+            'client': self.client,
+        }
+        response = {'started': False, 'chunked': False}
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response.update(status=message['status'], headers=list(message.get('headers', [])))
+                return
+            chunk = message.get('body', b'')
+            more = message.get('more_body', False)
+            if not response['started']:
+                response['started'] = True
+                out_headers = response['headers']
+                if not any(name.lower() == b'content-length' for name, _ in out_headers):
+                    if more:
+                        response['chunked'] = True
+                        out_headers.append((b'transfer-encoding', b'chunked'))
+                    else:
+                        out_headers.append((b'content-length', str(len(chunk)).encode()))
+                out_headers.append((b'connection', b'keep-alive' if keep_alive else b'close'))
+                self.writer.write(self.status_line(response['status']) + b''.join(
+                    name + b': ' + value + b'\r\n' for name, value in out_headers) + b'\r\n')
+            if response['chunked']:
+                if chunk:
+                    self.writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                if not more:
+                    self.writer.write(b'0\r\n\r\n')
+            elif chunk:
+                self.writer.write(chunk)
+            await self.writer.drain()
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception as e:
+            print(f"Error handling {method} {target}: {type(e).__name__}: {e}")
+            if not response['started']:
+                await self.error(500)
+            return False
+        return keep_alive
+
+    def status_line(self, status):
+        return f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n".encode()
+
+    async def error(self, status):
+        body = to_json({"status": "error", "message": REASONS[status]})
+        self.writer.write(self.status_line(status) + b'content-type: application/json\r\n'
+                          b'content-length: %d\r\nconnection: close\r\n\r\n%s' % (len(body), body))
+        await self.writer.drain()
+
+def raise_open_file_limit():
+    """Raise the soft open-files limit to the hard limit; each connection is a file descriptor"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            return soft
+    return hard
+
+async def serve_async(application, port):
+    keepalive_timeout = float(os.getenv('KEEPALIVE_TIMEOUT', 75))
+    backlog = int(os.getenv('LISTEN_BACKLOG', 4096))
+
+    async def handle(reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await HTTPConnection(application, reader, writer, keepalive_timeout).serve()
+
+    server = await asyncio.start_server(handle, '0.0.0.0', port, backlog=backlog,
+                                        limit=MAX_HEADER_BYTES, reuse_address=True)
+    async with server:
+        await server.serve_forever()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    print(f"Starting web application on port {port}...")
-    app.run(host='0.0.0.0', port=port)
+    mode = os.getenv('SERVER_MODE', 'flask').lower()
+    if mode == 'async':
+        limit = raise_open_file_limit()
+        print(f"Starting web application on port {port} (async, up to {limit} open files)...", flush=True)
+        try:
+            asyncio.run(serve_async(asgi_app, port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(f"Starting web application on port {port}...")
+        app.run(host='0.0.0.0', port=port)
@@ -2,33 +2,182 @@
 """
 Simple Blog App - Demonstrates ConfigMap usage
 Reads blog configuration from ConfigMap-mounted files
+
+The configuration is reloaded without a restart when the ConfigMap changes:
+a background thread watches for the kubelet's atomic `..data` symlink swap,
+validates the new JSON and switches to it, or keeps the last good version.
+  CONFIG_PATH           configuration file (default: /config/blog.json)
+  CONFIG_POLL_INTERVAL  seconds between checks for a new version (default: 2, 0 = off)
+
+The index page is rendered once per config version and served from memory,
+gzip-compressed when the client accepts it, with an ETag for conditional GETs.
+  PAGE_CACHE            "false" to render the page on every request (default: true)
 """
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, render_template_string, jsonify, request
+from datetime import datetime
+import gzip
+import hashlib
 import os
 import json
+import threading
+import time
 
 app = Flask(__name__)
 
 # Read configuration from ConfigMap mount
-CONFIG_PATH = '/config/blog.json'
+CONFIG_PATH = os.getenv('CONFIG_PATH', '/config/blog.json')
+
+# Expected types of the known settings; other keys are allowed
+CONFIG_SCHEMA = {
+    'blog_name': str,
+    'tagline': str,
+    'author': str,
+    'theme': str,
+    'max_posts_per_page': int,
+    'comments_enabled': bool,
+}
+
+def validate_config(config):
+    """Raise ValueError if the parsed configuration can't be used"""
+    if not isinstance(config, dict):
+        raise ValueError("configuration must be a JSON object")
+    for key, expected in CONFIG_SCHEMA.items():
+        if key not in config:
+            continue
+        value = config[key]
+        # bool is a subclass of int, but true is not a page size
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f"'{key}' must be of type {expected.__name__}, got {type(value).__name__}")
+    if config.get('max_posts_per_page', 1) < 1:
+        raise ValueError("'max_posts_per_page' must be at least 1")
+
+def load_config(path=CONFIG_PATH):
+    """Load blog configuration from ConfigMap
 
-def load_config():
-    """Load blog configuration from ConfigMap"""
+    Returns (config, raw bytes).
+    """
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            config = json.load(f)
-            print(f"✅ Configuration loaded: {config}")
-            return config
+        with open(path, 'rb') as f:
+            raw = f.read()
+        config = json.loads(raw)
+        validate_config(config)
+        print(f"✅ Configuration loaded: {config}")
+        return config, raw
     except FileNotFoundError:
-        print(f"❌ ERROR: Configuration file not found at {CONFIG_PATH}")
+        print(f"❌ ERROR: Configuration file not found at {path}")
         print("Make sure the ConfigMap is mounted correctly!")
         raise
     except json.JSONDecodeError as e:
         print(f"❌ ERROR: Invalid JSON in configuration: {e}")
         raise
+    except ValueError as e:
+        print(f"❌ ERROR: Invalid configuration: {e}")
+        raise
+
+class ConfigStore:
+    """The active configuration, replaced atomically when the ConfigMap changes
+
+    Kubelet updates a ConfigMap volume by writing the new files into a fresh
+    timestamped directory and then renaming the `..data` symlink to point at
+    it, so a change shows up as a new `..data` target. Without `..data` (e.g.
+    a plain file when running locally) the file's inode, mtime and size are
+    watched instead. Note that subPath mounts are never updated by kubelet.
+
+    Readers take `store.current` once per request and get a consistent
+    snapshot: a dict with the config, its version and where it came from.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data_link = os.path.join(os.path.dirname(path), '..data')
+        self.lock = threading.Lock()
+        self.last_error = None
+        self.seen = self.fingerprint()
+        config, raw = load_config(path)
+        self.current = self.snapshot(config, raw, 1)
+
+    def fingerprint(self):
+        """Identifies the version on disk without reading it"""
+        try:
+            return ('..data', os.readlink(self.data_link))
+        except OSError:
+            pass
+        try:
+            st = os.stat(self.path)
+            return ('stat', st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def source(self):
+        """The `..data` target (kubelet's timestamped directory) or the file path"""
+        return self.seen[1] if self.seen and self.seen[0] == '..data' else self.path
+
+    def snapshot(self, config, raw, version):
+        return {
+            'config': config,
+            'version': version,
+            'checksum': hashlib.sha256(raw).hexdigest()[:12],
+            'loaded_at': datetime.now().isoformat(),
+            'source': self.source(),
+        }
+
+    def check(self):
+        """Load the configuration if it changed on disk; True if a new version is active"""
+        fingerprint = self.fingerprint()
+        if fingerprint == self.seen:
+            return False
+        if fingerprint is None:
+            # Keep serving the last good config if the mount disappears
+            self.reject(fingerprint, f"{self.path} is missing")
+            return False
+
+        # Resolve the symlinks once so the whole read comes from one version
+        resolved = os.path.realpath(self.path)
+        try:
+            with open(resolved, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            # Kubelet may have removed the old directory mid-swap; retry next poll
+            return False
+        try:
+            config = json.loads(raw)
+            validate_config(config)
+        except ValueError as e:
+            self.reject(fingerprint, f"{type(e).__name__}: {e}")
+            return False
+
+        with self.lock:
+            self.seen = fingerprint
+            self.last_error = None
+            current = self.current
+            if hashlib.sha256(raw).hexdigest()[:12] == current['checksum']:
+                # Same content in a new directory: nothing to switch
+                self.current = dict(current, source=self.source())
+                return False
+            self.current = self.snapshot(config, raw, current['version'] + 1)
+        print(f"🔄 Configuration reloaded (version {self.current['version']}): {config}")
+        return True
+
+    def reject(self, fingerprint, message):
+        with self.lock:
+            self.seen = fingerprint
+            self.last_error = {'message': message, 'at': datetime.now().isoformat()}
+        print(f"❌ ERROR: Rejected configuration update, keeping version {self.current['version']}: {message}")
+
+    def watch(self, interval):
+        """Poll for changes in a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"❌ ERROR: Configuration watcher: {type(e).__name__}: {e}")
+
+        threading.Thread(target=run, name='config-watcher', daemon=True).start()
 
 # Load config at startup
-blog_config = load_config()
+config_store = ConfigStore(CONFIG_PATH)
 
 BLOG_TEMPLATE = """
 <!DOCTYPE html>
@@ -113,10 +262,13 @@ BLOG_TEMPLATE = """
 </html>
 """
 
-@app.route('/')
-def index():
-    return render_template_string(
-        BLOG_TEMPLATE,
+# Compiled once; render_template_string parses and compiles it on every call
+blog_template = app.jinja_env.from_string(BLOG_TEMPLATE)
+
+PAGE_CACHE = os.getenv('PAGE_CACHE', 'true').lower() not in ('0', 'false', 'no', 'off')
+
+def template_context(blog_config):
+    return dict(
         blog_name=blog_config.get('blog_name', 'My Blog'),
         tagline=blog_config.get('tagline', 'Powered by Kubernetes'),
         author=blog_config.get('author', 'Unknown'),
@@ -126,16 +278,82 @@ def index():
         pod_name=os.getenv('HOSTNAME', 'unknown')
     )
 
+class PageCache:
+    """The index page rendered for one config version, plain and gzip-compressed
+
+    Nothing on the page changes between config versions, so it is rendered
+    and compressed once when a request first sees a new version.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.page = None
+
+    def get(self, current):
+        page = self.page
+        if page is None or page['version'] != current['version']:
+            # One thread renders; the others wait for it instead of rendering too
+            with self.lock:
+                page = self.page
+                if page is None or page['version'] != current['version']:
+                    page = self.page = self.render(current)
+        return page
+
+    def render(self, current):
+        html = blog_template.render(**template_context(current['config'])).encode()
+        return {
+            'version': current['version'],
+            'html': html,
+            'gzip': gzip.compress(html, compresslevel=9, mtime=0),
+            # The pod name is on the page, so the tag is taken from the content
+            'etag': hashlib.sha256(html).hexdigest()[:16],
+        }
+
+page_cache = PageCache()
+
+@app.route('/')
+def index():
+    current = config_store.current
+    if not PAGE_CACHE:
+        return render_template_string(BLOG_TEMPLATE, **template_context(current['config']))
+
+    page = page_cache.get(current)
+    compressed = request.accept_encodings['gzip'] > 0
+    # Each encoding is a different representation and gets its own tag
+    etag = page['etag'] + ('-gzip' if compressed else '')
+    headers = {
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding',
+        # Cache, but revalidate every time so config changes show up at once
+        'Cache-Control': 'no-cache',
+        'X-Config-Version': str(page['version']),
+    }
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+
+    response = Response(page['gzip'] if compressed else page['html'], mimetype='text/html', headers=headers)
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 @app.route('/config')
 def config():
-    """Return current configuration as JSON"""
-    return jsonify(blog_config)
+    """Return current configuration as JSON, with its version under _meta"""
+    current = config_store.current
+    meta = {key: value for key, value in current.items() if key != 'config'}
+    meta['last_error'] = config_store.last_error
+    response = jsonify({**current['config'], '_meta': meta})
+    response.headers['X-Config-Version'] = str(current['version'])
+    return response
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy', 'config_loaded': True})
+    return jsonify({'status': 'healthy', 'config_loaded': True, 'config_version': config_store.current['version']})
 
 if __name__ == '__main__':
     print("Starting Blog App...")
-    print(f"Configuration: {blog_config}")
+    print(f"Configuration: {config_store.current['config']}")
+    interval = float(os.getenv('CONFIG_POLL_INTERVAL', 2))
+    if interval > 0:
+        config_store.watch(interval)
     app.run(host='0.0.0.0', port=5000)
@@ -3,11 +3,30 @@
 Pod Monitor Dashboard - Demonstrates RBAC usage
 Lists pods in the namespace using Kubernetes API
 Requires proper ServiceAccount with RBAC permissions
+
+Pods are kept in memory by a list+watch informer, so the API server sees
+one LIST and one open WATCH per replica however many dashboards are open.
+  WATCH_TIMEOUT  seconds before a watch is renewed from the last resourceVersion (default: 300)
+
+For namespaces with thousands of pods, /api/pods can also page through the
+API server directly, one page in memory at a time:
+  /api/pods?limit=500&continue=TOKEN  one page (limit at most 5000), passed through to the API server
+  /api/pods?stream=ndjson             every pod, one JSON object per line, written as read
+  /api/pods?stream=json               the same as a single JSON document
+
+/api/pods/events streams pod changes as Server-Sent Events (a snapshot,
+then added/updated/deleted deltas). With DASHBOARD_MODE=live (or /?mode=live)
+the dashboard applies them in place instead of reloading every 5 seconds.
 """
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, render_template_string, jsonify, request
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from datetime import datetime, timezone
+import json
 import os
+import queue
+import threading
+import time
 
 app = Flask(__name__)
 
@@ -28,7 +47,9 @@ DASHBOARD_TEMPLATE = """
 <head>
     <title>Pod Monitor Dashboard</title>
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    {% if not live %}
     <meta http-equiv="refresh" content="5">
+    {% endif %}
     <style>
         body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -119,26 +140,28 @@ DASHBOARD_TEMPLATE = """
         <p class="subtitle">Real-time Pod Status | Namespace: {{ namespace }}</p>
     </div>
 
-    {% if error %}
-    <div class="error-message">
+    {# In live mode both sections are rendered and shown or hidden as events arrive #}
+    {% if error or live %}
+    <div class="error-message" id="error"{% if not error %} hidden{% endif %}>
         <h2>❌ Permission Denied</h2>
-        <p><strong>Error:</strong> {{ error }}</p>
+        <p><strong>Error:</strong> <span class="error-text">{{ error }}</span></p>
         <p>This application needs permission to list pods in the namespace.</p>
         <p><strong>Check:</strong> ServiceAccount, Role, and RoleBinding configuration</p>
     </div>
-    {% else %}
-    <div class="pod-grid">
+    {% endif %}
+    {% if not error or live %}
+    <div class="pod-grid" id="pods"{% if error %} hidden{% endif %}>
         {% for pod in pods %}
-        <div class="pod-card">
+        <div class="pod-card" data-name="{{ pod.name }}" data-created="{{ pod.created }}">
             <div class="pod-name">{{ pod.name }}</div>
             <div class="pod-status status-{{ pod.status|lower }}">
                 {{ pod.status }}
             </div>
             <div class="pod-info">
-                <div>📦 <strong>Ready:</strong> {{ pod.ready }}</div>
-                <div>🔄 <strong>Restarts:</strong> {{ pod.restarts }}</div>
-                <div>⏱️  <strong>Age:</strong> {{ pod.age }}</div>
-                <div>🏷️  <strong>Node:</strong> {{ pod.node }}</div>
+                <div>📦 <strong>Ready:</strong> <span class="ready">{{ pod.ready }}</span></div>
+                <div>🔄 <strong>Restarts:</strong> <span class="restarts">{{ pod.restarts }}</span></div>
+                <div>⏱️  <strong>Age:</strong> <span class="age">{{ pod.age }}</span></div>
+                <div>🏷️  <strong>Node:</strong> <span class="node">{{ pod.node }}</span></div>
             </div>
         </div>
         {% endfor %}
@@ -146,64 +169,411 @@ DASHBOARD_TEMPLATE = """
     {% endif %}
 
     <div class="footer">
+        {% if live %}
+        <p><span id="live-state">Connecting...</span> | Pod: {{ current_pod }}</p>
+        {% else %}
         <p>Auto-refreshes every 5 seconds | Pod: {{ current_pod }}</p>
+        {% endif %}
     </div>
+
+    {% if live %}
+    <script>
+    // Apply pod deltas from /api/pods/events to the cards in place
+    const grid = document.getElementById('pods');
+    const errorBox = document.getElementById('error');
+    const liveState = document.getElementById('live-state');
+
+    function formatAge(created) {
+        const seconds = (Date.now() - Date.parse(created)) / 1000;
+        if (seconds < 60) return Math.floor(seconds) + 's';
+        if (seconds < 3600) return Math.floor(seconds / 60) + 'm';
+        return Math.floor(seconds / 3600) + 'h';
+    }
+
+    function newCard() {
+        const card = document.createElement('div');
+        card.className = 'pod-card';
+        card.innerHTML = '<div class="pod-name"></div><div class="pod-status"></div><div class="pod-info">' +
+            '<div>📦 <strong>Ready:</strong> <span class="ready"></span></div>' +
+            '<div>🔄 <strong>Restarts:</strong> <span class="restarts"></span></div>' +
+            '<div>⏱️  <strong>Age:</strong> <span class="age"></span></div>' +
+            '<div>🏷️  <strong>Node:</strong> <span class="node"></span></div></div>';
+        return card;
+    }
+
+    function fill(card, pod) {
+        card.dataset.name = pod.name;
+        card.dataset.created = pod.created;
+        card.querySelector('.pod-name').textContent = pod.name;
+        const status = card.querySelector('.pod-status');
+        status.textContent = pod.status;
+        status.className = 'pod-status status-' + String(pod.status).toLowerCase();
+        card.querySelector('.ready').textContent = pod.ready;
+        card.querySelector('.restarts').textContent = pod.restarts;
+        card.querySelector('.age').textContent = formatAge(pod.created);
+        card.querySelector('.node').textContent = pod.node;
+    }
+
+    function findCard(name) {
+        return Array.from(grid.children).find(card => card.dataset.name === name);
+    }
+
+    function upsert(pod) {
+        let card = findCard(pod.name);
+        if (!card) {
+            // Keep the cards sorted by name, like the server renders them
+            card = newCard();
+            const next = Array.from(grid.children).find(other => other.dataset.name > pod.name);
+            grid.insertBefore(card, next || null);
+        }
+        fill(card, pod);
+    }
+
+    function showError(message) {
+        errorBox.querySelector('.error-text').textContent = message;
+        errorBox.hidden = false;
+        grid.hidden = true;
+    }
+
+    const events = new EventSource('/api/pods/events');
+    events.onopen = () => { liveState.textContent = 'Live updates'; };
+    events.onerror = () => { liveState.textContent = 'Reconnecting...'; };
+    events.addEventListener('snapshot', e => {
+        grid.replaceChildren();
+        JSON.parse(e.data).pods.forEach(upsert);
+        errorBox.hidden = true;
+        grid.hidden = false;
+    });
+    events.addEventListener('added', e => upsert(JSON.parse(e.data)));
+    events.addEventListener('updated', e => upsert(JSON.parse(e.data)));
+    events.addEventListener('deleted', e => {
+        const card = findCard(JSON.parse(e.data).name);
+        if (card) card.remove();
+    });
+    events.addEventListener('api-error', e => showError(JSON.parse(e.data).error));
+
+    // Ages change without any event
+    setInterval(() => {
+        for (const card of grid.children) {
+            card.querySelector('.age').textContent = formatAge(card.dataset.created);
+        }
+    }, 5000);
+    </script>
+    {% endif %}
 </body>
 </html>
 """
 
-def get_pods():
-    """Get list of pods in namespace"""
+def format_age(created):
+    """Age of a pod as 42s, 5m or 3h"""
+    age_seconds = (datetime.now(timezone.utc) - created).total_seconds()
+    if age_seconds < 60:
+        return f"{int(age_seconds)}s"
+    elif age_seconds < 3600:
+        return f"{int(age_seconds/60)}m"
+    else:
+        return f"{int(age_seconds/3600)}h"
+
+def summarize_pod(pod):
+    """The fields the dashboard shows, from a pod as raw API JSON; age is left to read time
+
+    Raw JSON is used instead of the client's V1Pod models, whose
+    deserialization dominates the cost of large lists.
+    """
+    container_statuses = pod.get('status', {}).get('containerStatuses') or []
+
+    # Get ready count
+    ready_count = sum(1 for c in container_statuses if c.get('ready'))
+    total_count = len(pod['spec']['containers'])
+
+    # Get restart count
+    restarts = sum(c.get('restartCount', 0) for c in container_statuses)
+
+    return {
+        'name': pod['metadata']['name'],
+        'status': pod.get('status', {}).get('phase'),
+        'ready': f"{ready_count}/{total_count}",
+        'restarts': restarts,
+        'created': datetime.fromisoformat(pod['metadata']['creationTimestamp']),
+        'node': pod['spec'].get('nodeName') or 'N/A'
+    }
+
+def with_age(pod):
+    """A stored pod summary as served, with its current age"""
+    pod = dict(pod)
+    pod['age'] = format_age(pod['created'])
+    pod['created'] = pod['created'].isoformat()
+    return pod
+
+def list_pods_raw(api, namespace, **kwargs):
+    """LIST pods as raw JSON"""
+    response = api.list_namespaced_pod(namespace=namespace, _preload_content=False, **kwargs)
     try:
-        pods = v1.list_namespaced_pod(namespace=NAMESPACE)
-        pod_list = []
-
-        for pod in pods.items:
-            # Calculate age
-            from datetime import datetime, timezone
-            age_seconds = (datetime.now(timezone.utc) - pod.metadata.creation_timestamp).total_seconds()
-            if age_seconds < 60:
-                age = f"{int(age_seconds)}s"
-            elif age_seconds < 3600:
-                age = f"{int(age_seconds/60)}m"
+        return json.loads(response.data)
+    finally:
+        response.release_conn()
+
+def api_error_message(e):
+    if e.status == 403:
+        return "Forbidden: ServiceAccount lacks permission to list pods. Check RBAC configuration!"
+    return f"API Error {e.status}: {e.reason}"
+
+class PodInformer:
+    """In-memory pod store kept current with list+watch
+
+    A LIST fills the store and returns the resourceVersion to WATCH from;
+    the watch applies ADDED/MODIFIED/DELETED events and bookmarks move the
+    resourceVersion forward. When a watch times out it is resumed from the
+    last resourceVersion; when the API server no longer has that version
+    (410 Gone) the store is rebuilt with a fresh LIST. Errors such as a 403
+    are reported to readers and retried with backoff, so fixing RBAC takes
+    effect without restarting the pod.
+
+    Subscribers get a snapshot followed by the changes to what the dashboard
+    shows: added/updated/deleted for pods (a relist is diffed against the
+    store), api-error when the API can't be read. Events that don't change a
+    pod's summary, such as annotation updates, are not sent.
+    """
+
+    def __init__(self, api, namespace, watch_timeout=300):
+        self.api = api
+        self.namespace = namespace
+        self.watch_timeout = watch_timeout
+        self.lock = threading.Lock()
+        self.pods = {}
+        self.resource_version = None
+        # Whether the watch got any event since the last LIST
+        self.progressed = False
+        self.error = None
+        self.synced = threading.Event()
+        self.subscribers = set()
+        self.thread = threading.Thread(target=self.run, name='pod-informer', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def get_pods(self, timeout=5):
+        """(pods, error) from the store, waiting briefly for the first LIST"""
+        self.synced.wait(timeout)
+        with self.lock:
+            if self.error:
+                return [], self.error
+            if not self.synced.is_set():
+                return [], "Waiting for the first pod list from the API server..."
+            pods = [with_age(pod) for pod in self.pods.values()]
+        pods.sort(key=lambda pod: pod['name'])
+        return pods, None
+
+    def snapshot_event(self):
+        """Called with the lock held"""
+        if self.error:
+            return 'api-error', {'error': self.error}
+        pods = sorted((with_age(pod) for pod in self.pods.values()), key=lambda pod: pod['name'])
+        return 'snapshot', {'pods': pods, 'count': len(pods)}
+
+    def subscribe(self, max_pending=1000):
+        """A queue of (event, data) changes, starting with the current state"""
+        self.synced.wait(5)
+        events = queue.Queue(maxsize=max_pending)
+        with self.lock:
+            if self.synced.is_set():
+                events.put_nowait(self.snapshot_event())
+            self.subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self.lock:
+            self.subscribers.discard(events)
+
+    def publish(self, event, data):
+        """Called with the lock held, so subscribers see changes in store order"""
+        for events in list(self.subscribers):
+            try:
+                events.put_nowait((event, data))
+            except queue.Full:
+                # Too slow to keep up: end its stream; the browser reconnects
+                # and starts over from a snapshot
+                self.subscribers.discard(events)
+                with events.mutex:
+                    events.queue.clear()
+                events.put_nowait(None)
+
+    def apply(self, name, summary):
+        """Store a pod's summary (None = deleted) and publish the change, with the lock held"""
+        previous = self.pods.get(name)
+        if summary is None:
+            if previous is not None:
+                del self.pods[name]
+                self.publish('deleted', {'name': name})
+        elif summary != previous:
+            self.pods[name] = summary
+            self.publish('added' if previous is None else 'updated', with_age(summary))
+
+    def list(self):
+        pods = list_pods_raw(self.api, self.namespace)
+        store = {}
+        for pod in pods['items']:
+            summary = summarize_pod(pod)
+            store[summary['name']] = summary
+        with self.lock:
+            if self.error or not self.synced.is_set():
+                self.pods = store
+                self.error = None
+                self.publish(*self.snapshot_event())
             else:
-                age = f"{int(age_seconds/3600)}h"
+                # Send only what changed while the watch was down
+                for name in [name for name in self.pods if name not in store]:
+                    self.apply(name, None)
+                for name, summary in store.items():
+                    self.apply(name, summary)
+            self.resource_version = pods['metadata']['resourceVersion']
+            self.progressed = False
+        self.synced.set()
+        print(f"✅ Listed {len(store)} pods in {self.namespace} (resourceVersion {self.resource_version})")
 
-            # Get ready count
-            ready_count = sum(1 for c in pod.status.container_statuses if c.ready) if pod.status.container_statuses else 0
-            total_count = len(pod.spec.containers)
+    def watch(self):
+        """Apply events until the watch times out; raises ApiException on errors
 
-            # Get restart count
-            restarts = sum(c.restart_count for c in pod.status.container_statuses) if pod.status.container_statuses else 0
+        The event lines are parsed here: watch.Watch would deserialize every
+        pod into a V1Pod model first, the same cost the raw LIST avoids.
+        """
+        response = self.api.list_namespaced_pod(
+            namespace=self.namespace,
+            watch=True,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout,
+            allow_watch_bookmarks=True,
+            # Don't hang on a connection that died without being closed
+            _request_timeout=self.watch_timeout + 30,
+            _preload_content=False,
+        )
+        try:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                obj = event['object']
+                if event['type'] == 'ERROR':
+                    # A Status object, e.g. 410 Gone for an expired resourceVersion
+                    raise ApiException(status=obj.get('code'), reason=f"{obj.get('reason')}: {obj.get('message')}")
+                self.progressed = True
+                if event['type'] == 'BOOKMARK':
+                    with self.lock:
+                        self.resource_version = obj['metadata']['resourceVersion']
+                    continue
+                with self.lock:
+                    self.apply(obj['metadata']['name'], None if event['type'] == 'DELETED' else summarize_pod(obj))
+                    self.resource_version = obj['metadata']['resourceVersion']
+        finally:
+            response.close()
+            response.release_conn()
 
-            pod_list.append({
-                'name': pod.metadata.name,
-                'status': pod.status.phase,
-                'ready': f"{ready_count}/{total_count}",
-                'restarts': restarts,
-                'age': age,
-                'node': pod.spec.node_name or 'N/A'
-            })
+    def fail(self, error_msg):
+        with self.lock:
+            changed = error_msg != self.error
+            self.error = error_msg
+            if changed:
+                self.publish('api-error', {'error': error_msg})
+        self.synced.set()
+        if changed:
+            print(f"❌ ERROR: {error_msg}")
 
-        return pod_list, None
+    def run(self):
+        delay = 1
+        relist = True
+        while True:
+            try:
+                if relist:
+                    self.list()
+                    relist = False
+                self.watch()
+                delay = 1
+                continue
+            except ApiException as e:
+                if e.status == 410:
+                    print(f"🔄 resourceVersion {self.resource_version} expired (410 Gone), relisting")
+                    relist = True
+                    if self.progressed:
+                        continue
+                    # Expired straight after a LIST: don't hammer the API server
+                    time.sleep(delay)
+                    delay = min(delay * 2, 30)
+                    continue
+                self.fail(api_error_message(e))
+            except Exception as e:
+                self.fail(f"Unexpected error: {str(e)}")
+            # Start over from a fresh LIST once the API server lets us
+            relist = True
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
 
-    except ApiException as e:
-        if e.status == 403:
-            error_msg = "Forbidden: ServiceAccount lacks permission to list pods. Check RBAC configuration!"
-        else:
-            error_msg = f"API Error {e.status}: {e.reason}"
-        print(f"❌ ERROR: {error_msg}")
-        return [], error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print(f"❌ ERROR: {error_msg}")
-        return [], error_msg
+# Default page size when streaming every pod, and the most one request may ask for
+STREAM_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+def list_pods_page(limit, continue_token=None):
+    """One page from the API server: (pods, continue token or None, resourceVersion)"""
+    kwargs = {'limit': limit}
+    if continue_token:
+        kwargs['_continue'] = continue_token
+    page = list_pods_raw(v1, NAMESPACE, **kwargs)
+    metadata = page.get('metadata', {})
+    pods = [with_age(summarize_pod(pod)) for pod in page.get('items', [])]
+    return pods, metadata.get('continue') or None, metadata.get('resourceVersion')
+
+def page_error(e):
+    """(message, HTTP status) for a failed paginated LIST"""
+    if e.status == 410:
+        return "Continue token expired (410 Gone); start again without 'continue'", 410
+    return api_error_message(e), e.status if e.status in (401, 403, 404) else 502
+
+def encode(value):
+    return json.dumps(value, separators=(',', ':'), sort_keys=True)
+
+def stream_pods(first_page, limit, ndjson):
+    """Write every pod as it is read, fetching one page at a time"""
+    pods, continue_token, _ = first_page
+    count = 0
+    if not ndjson:
+        yield '{"pods":['
+    while True:
+        for pod in pods:
+            if ndjson:
+                yield encode(pod) + '\n'
+            else:
+                yield (',' if count else '') + encode(pod)
+            count += 1
+        if not continue_token:
+            break
+        try:
+            pods, continue_token, _ = list_pods_page(limit, continue_token)
+        except ApiException as e:
+            # The status line has been sent; report the error in the body
+            error = page_error(e)[0]
+            print(f"❌ ERROR: {error}")
+            yield encode({'error': error}) + '\n' if ndjson else f'],"count":{count},"error":{encode(error)}}}'
+            return
+    if not ndjson:
+        yield f'],"count":{count}}}'
+
+informer = PodInformer(v1, NAMESPACE, int(os.getenv('WATCH_TIMEOUT', 300)))
+informer.start()
+
+def get_pods():
+    """Get list of pods in namespace"""
+    return informer.get_pods()
+
+DASHBOARD_MODE = os.getenv('DASHBOARD_MODE', 'refresh').lower()
+
+# Seconds between SSE comments that keep idle connections (and proxies) open
+SSE_KEEPALIVE = 15
 
 @app.route('/')
 def index():
     pods, error = get_pods()
     return render_template_string(
         DASHBOARD_TEMPLATE,
+        live=request.args.get('mode', DASHBOARD_MODE) == 'live',
         pods=pods,
         error=error,
         namespace=NAMESPACE,
@@ -213,11 +583,71 @@ def index():
 @app.route('/api/pods')
 def api_pods():
     """Return pods as JSON"""
+    stream = request.args.get('stream')
+    if stream or 'limit' in request.args or 'continue' in request.args:
+        return api_pods_paged(stream)
+
     pods, error = get_pods()
     if error:
-        return jsonify({'error': error}), 403
+        return jsonify({'error': error}), 403 if informer.synced.is_set() else 503
     return jsonify({'pods': pods, 'count': len(pods)})
 
+def api_pods_paged(stream):
+    """Pods paged straight from the API server instead of the informer store"""
+    if stream not in (None, 'json', 'ndjson'):
+        return jsonify({'error': "'stream' must be json or ndjson"}), 400
+    try:
+        limit = int(request.args.get('limit', STREAM_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': "'limit' must be a positive integer"}), 400
+    # Larger pages are clamped; clients follow the continue token either way
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    # Fetch the first page before answering, so errors get a proper status code
+    try:
+        first_page = list_pods_page(limit, request.args.get('continue'))
+    except ApiException as e:
+        error, status = page_error(e)
+        print(f"❌ ERROR: {error}")
+        return jsonify({'error': error}), status
+
+    if stream:
+        mimetype = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+        return Response(stream_pods(first_page, limit, stream == 'ndjson'), mimetype=mimetype)
+
+    pods, continue_token, resource_version = first_page
+    return jsonify({'pods': pods, 'count': len(pods), 'continue': continue_token, 'resourceVersion': resource_version})
+
+@app.route('/api/pods/events')
+def api_pod_events():
+    """Stream pod changes as Server-Sent Events"""
+    events = informer.subscribe()
+
+    def stream():
+        try:
+            # Browsers reconnect after this many milliseconds and get a new snapshot
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    item = events.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield f"event: {event}\ndata: {encode(data)}\n\n"
+        finally:
+            informer.unsubscribe(events)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx (ingress) from buffering the stream
+        'X-Accel-Buffering': 'no',
+    })
+
 @app.route('/health')
 def health():
     return jsonify({'status': 'healthy'})
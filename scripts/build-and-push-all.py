@@ -4,9 +4,21 @@ Universal Build and Push Script for K8s Workshop
 Works on Windows, macOS, Linux - anywhere Python is installed
 """
 
+import argparse
+import hashlib
+import json
 import subprocess
 import sys
 import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Configuration
@@ -30,139 +42,1046 @@ SCENARIOS = [
     ("redis", "10-init-container-failure/redis"),
 ]
 
+# Build-state manifest: content hash and pushed digest per scenario
+STATE_FILE = Path(__file__).parent / ".build-state.json"
+
+# Platforms every image is built for
+PLATFORMS = ["linux/amd64", "linux/arm64"]
+
+# buildx builder used for multi-platform builds
+BUILDER_NAME = "multiplatform"
+
+# Stand-in docker CLI put on PATH by --simulate
+SIMULATOR_DIR = Path(__file__).parent / "simulator"
+
+# Validated prerequisites (builder, login) are cached for a short time so
+# repeated runs skip straight to building
+PREREQ_CACHE_FILE = Path.home() / ".cache" / "k8s-workshop" / "prerequisites.json"
+PREREQ_CACHE_TTL = 600
+
+# Machine-readable timing report written after every run
+REPORT_FILE = Path(__file__).parent / "build-report.json"
+
+# Compressed size budgets per image, and where the last size analysis is
+# kept (next to the build-state manifest) for per-layer diffs
+BUDGET_FILE = Path(__file__).parent / "image-budgets.json"
+SIZES_FILE_NAME = ".image-sizes.json"
+LARGEST_LAYERS = 3
+
+# buildx --progress plain lines that mark the start of the export/push stage
+PUSH_MARKERS = ("exporting to image", "pushing layers", "pushing manifest")
+
+# Registry errors worth retrying when pushing in --pipeline mode
+TRANSIENT_PUSH_ERRORS = (
+    "timeout", "timed out", "connection reset", "connection refused", "broken pipe",
+    "tls handshake", "unexpected eof", "toomanyrequests", "429 too many requests",
+    "500 internal server error", "502 bad gateway", "503 service unavailable", "504 gateway",
+)
+PUSH_RETRY_BACKOFF = 2.0
+
+# buildx --progress plain lines for Dockerfile steps ("#8 [linux/arm64 3/5] RUN ...")
+# and for steps answered from the layer cache ("#8 CACHED")
+STEP_LINE = re.compile(r"^#(\d+) \[(?:[^\]]* )?\d+/\d+\] (\w+)")
+CACHED_LINE = re.compile(r"^#(\d+) CACHED$")
+
+# Files that never affect an image and are ignored when hashing a build context
+HASH_IGNORE = {"__pycache__", ".DS_Store"}
+
+# Result of processing one scenario
+BUILT = "built"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+# Serializes output from concurrent build jobs so lines never interleave
+print_lock = threading.Lock()
+
 def print_header(message):
     """Print formatted header"""
     print("\n" + "=" * 60)
     print(f"  {message}")
     print("=" * 60 + "\n")
 
-def run_command(cmd, description):
-    """Run a shell command and handle errors"""
-    print(f"▶ {description}")
+def log(message, prefix=None):
+    """Print a message, prefixing every line with the job name if given"""
+    if prefix:
+        message = "\n".join(
+            f"[{prefix}] {line}" if line else line
+            for line in message.split("\n")
+        )
+    with print_lock:
+        print(message, flush=True)
+
+def format_size(num_bytes):
+    """Format a byte count for humans"""
+    if num_bytes is None:
+        return "?"
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
+
+class CommandResult:
+    """Outcome of run_command; truthy when the command succeeded"""
+
+    def __init__(self, ok, duration=0.0, lines=None):
+        self.ok = ok
+        self.duration = duration
+        # (seconds since start, text) for every line of output
+        self.lines = lines or []
+
+    def __bool__(self):
+        return self.ok
+
+    def first_match(self, markers):
+        """Seconds from start until the first output line containing a marker"""
+        for offset, text in self.lines:
+            if any(marker in text for marker in markers):
+                return offset
+        return None
+
+def run_command(cmd, description, prefix=None):
+    """Run a shell command, streaming its output live, and handle errors"""
+    log(f"▶ {description}", prefix)
+    start = time.monotonic()
+    lines = []
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             cmd,
             shell=True,
-            check=True,
-            capture_output=True,
-            text=True
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1
         )
-        print(f"✅ {description} - SUCCESS\n")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} - FAILED")
-        print(f"Error: {e.stderr}\n")
-        return False
+    except OSError as e:
+        log(f"❌ {description} - FAILED\nError: {e}\n", prefix)
+        return CommandResult(False)
 
-def check_docker():
-    """Check if Docker is running"""
-    print_header("Checking Prerequisites")
+    for line in process.stdout:
+        line = line.rstrip()
+        lines.append((time.monotonic() - start, line))
+        log(f"  {line}", prefix)
+
+    ok = process.wait() == 0
+    duration = time.monotonic() - start
+    if not ok:
+        log(f"❌ {description} - FAILED (exit code {process.returncode})\n", prefix)
+    else:
+        log(f"✅ {description} - SUCCESS ({duration:.1f}s)\n", prefix)
+    return CommandResult(ok, duration, lines)
+
+def run_with_retry(cmd, description, prefix=None, retries=0):
+    """Run a command, retrying with exponential backoff on transient registry errors"""
+    for attempt in range(retries + 1):
+        result = run_command(cmd, description, prefix)
+        if result or attempt == retries:
+            return result
+
+        output = "\n".join(text for _, text in result.lines).lower()
+        if not any(pattern in output for pattern in TRANSIENT_PUSH_ERRORS):
+            return result
+
+        delay = PUSH_RETRY_BACKOFF * 2 ** attempt + random.uniform(0, 1)
+        log(f"🔁 Transient registry error - retrying in {delay:.1f}s ({attempt + 1}/{retries})", prefix)
+        time.sleep(delay)
+    return result
+
+class RunReport:
+    """Timings for every phase and image of a run, saved as JSON"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.start = time.monotonic()
+        self.phases = {}
+        self.images = {}
+        self.stages = {}
+        self.cache = {}
+        self.sizes = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work under the given phase name"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = round(time.monotonic() - start, 3)
+
+    def record_image(self, name, result, build_seconds=None, push_seconds=None, total_seconds=None):
+        """Record the outcome and timings of one image
+
+        Timings not given keep their earlier value, so the build and push
+        stages of --pipeline mode can report separately.
+        """
+        with self.lock:
+            entry = self.images.setdefault(name, {
+                "result": result,
+                "build_seconds": None,
+                "push_seconds": None,
+                "total_seconds": None,
+            })
+            entry["result"] = result
+            for key, value in (("build_seconds", build_seconds), ("push_seconds", push_seconds)):
+                if value is not None:
+                    entry[key] = round(value, 3)
+            if total_seconds is None:
+                known = [entry[key] for key in ("build_seconds", "push_seconds") if entry[key] is not None]
+                total_seconds = sum(known) if known else None
+            entry["total_seconds"] = None if total_seconds is None else round(total_seconds, 3)
+
+    def record_stage(self, stage, start, duration):
+        """Add one finished job to a pipeline stage's throughput figures"""
+        end = start + duration
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "busy_seconds": 0.0, "start": start, "end": end})
+            entry["count"] += 1
+            entry["busy_seconds"] += duration
+            entry["start"] = min(entry["start"], start)
+            entry["end"] = max(entry["end"], end)
+
+    def stage_summary(self):
+        """Return {stage: {count, busy_seconds, wall_seconds, per_minute}}"""
+        with self.lock:
+            summary = {}
+            for stage, entry in self.stages.items():
+                wall = entry["end"] - entry["start"]
+                summary[stage] = {
+                    "count": entry["count"],
+                    "busy_seconds": round(entry["busy_seconds"], 3),
+                    "wall_seconds": round(wall, 3),
+                    "per_minute": round(entry["count"] / wall * 60, 2) if wall > 0 else None,
+                }
+            return summary
 
-    # Check Docker
+    def to_dict(self):
+        return {
+            "version": VERSION,
+            "started_at": self.started_at,
+            "total_seconds": round(time.monotonic() - self.start, 3),
+            "phases": self.phases,
+            "images": self.images,
+            "stages": self.stage_summary(),
+            "cache": self.cache,
+            "sizes": self.sizes,
+        }
+
+    def save(self, path):
+        """Write the report as JSON"""
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2, sort_keys=True) + "\n")
+
+def split_build_push(command_result):
+    """Split a buildx --push run into (build seconds, push seconds)"""
+    push_start = command_result.first_match(PUSH_MARKERS)
+    if push_start is None:
+        return command_result.duration, None
+    return push_start, command_result.duration - push_start
+
+def compare_reports(current, previous, threshold, min_seconds):
+    """Return regressions of image and phase timings against a previous report"""
+    regressions = []
+
+    def check(label, new, old):
+        if new is None or old is None:
+            return
+        if new - old >= min_seconds and new > old * (1 + threshold):
+            regressions.append((label, old, new))
+
+    for name, timings in current["images"].items():
+        old = previous.get("images", {}).get(name)
+        if not old or timings["result"] != BUILT or old.get("result") != BUILT:
+            continue
+        check(f"{name} build", timings["build_seconds"], old.get("build_seconds"))
+        check(f"{name} push", timings["push_seconds"], old.get("push_seconds"))
+
+    for name, seconds in current["phases"].items():
+        check(f"phase {name}", seconds, previous.get("phases", {}).get(name))
+
+    return regressions
+
+def enable_simulation():
+    """Put the stand-in docker CLI first on PATH; no daemon or registry is used
+
+    Returns the directory holding the simulated registry and image store.
+    """
+    os.environ["PATH"] = str(SIMULATOR_DIR) + os.pathsep + os.environ.get("PATH", "")
+    if not os.environ.get("SIM_DOCKER_STATE"):
+        os.environ["SIM_DOCKER_STATE"] = tempfile.mkdtemp(prefix="k8s-workshop-sim-")
+    return Path(os.environ["SIM_DOCKER_STATE"])
+
+def load_prereq_cache(key):
+    """Return cached prerequisite results for key if they are still fresh"""
     try:
-        subprocess.run(["docker", "version"], capture_output=True, check=True)
-        print("✅ Docker is running")
-    except:
-        print("❌ Docker is not running or not installed")
-        print("Please start Docker Desktop and try again")
-        sys.exit(1)
+        entry = json.loads(PREREQ_CACHE_FILE.read_text()).get(key)
+    except (OSError, ValueError):
+        return None
+    if not entry or entry.get("docker_host") != os.environ.get("DOCKER_HOST", ""):
+        return None
+    # A different docker binary (e.g. the --simulate stand-in) needs its own checks
+    if entry.get("docker") != shutil.which("docker"):
+        return None
+    if time.time() - entry.get("checked_at", 0) > PREREQ_CACHE_TTL:
+        return None
+    return entry
 
-    # Check Docker buildx
+def save_prereq_cache(key, entry):
+    """Remember validated prerequisites for PREREQ_CACHE_TTL seconds"""
     try:
-        result = subprocess.run(
-            ["docker", "buildx", "version"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        print("✅ Docker buildx is available")
+        cache = json.loads(PREREQ_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    if entry is None:
+        cache.pop(key, None)
+    else:
+        cache[key] = dict(entry, checked_at=time.time(), docker_host=os.environ.get("DOCKER_HOST", ""),
+                          docker=shutil.which("docker"))
+    try:
+        PREREQ_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        PREREQ_CACHE_FILE.write_text(json.dumps(cache, indent=2) + "\n")
+    except OSError:
+        pass
+
+def check_docker_running(report):
+    """Return True if the Docker daemon answers"""
+    try:
+        with report.phase("docker_version"):
+            subprocess.run(["docker", "version"], capture_output=True, check=True)
+        return True
     except:
-        print("❌ Docker buildx is not available")
-        print("Please update Docker to a version that supports buildx")
-        sys.exit(1)
+        return False
 
-    # Setup buildx builder for multi-platform
-    print("\n▶ Setting up buildx builder for multi-platform builds")
+def check_buildx(report):
+    """Return True if docker buildx is available"""
     try:
-        # Check if builder exists
-        result = subprocess.run(
-            ["docker", "buildx", "inspect", "multiplatform"],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            # Create new builder
+        with report.phase("buildx_version"):
             subprocess.run(
-                ["docker", "buildx", "create", "--name", "multiplatform", "--use"],
-                check=True,
-                capture_output=True
+                ["docker", "buildx", "version"],
+                capture_output=True,
+                text=True,
+                check=True
             )
-            print("✅ Created multiplatform builder")
-        else:
-            # Use existing builder
+        return True
+    except:
+        return False
+
+def setup_builder(report):
+    """Select (or create) and bootstrap the multiplatform builder
+
+    Returns a list of status messages and an error (None on success).
+    """
+    messages = []
+    try:
+        with report.phase("builder_setup"):
+            # Check if builder exists
+            result = subprocess.run(
+                ["docker", "buildx", "inspect", BUILDER_NAME],
+                capture_output=True,
+                text=True
+            )
+            if result.returncode != 0:
+                # Create new builder
+                subprocess.run(
+                    ["docker", "buildx", "create", "--name", BUILDER_NAME, "--use"],
+                    check=True,
+                    capture_output=True
+                )
+                messages.append("✅ Created multiplatform builder")
+            else:
+                # Use existing builder
+                subprocess.run(
+                    ["docker", "buildx", "use", BUILDER_NAME],
+                    check=True,
+                    capture_output=True
+                )
+                messages.append("✅ Using existing multiplatform builder")
+
+        # Bootstrap the builder
+        with report.phase("buildx_bootstrap"):
             subprocess.run(
-                ["docker", "buildx", "use", "multiplatform"],
+                ["docker", "buildx", "inspect", "--bootstrap"],
                 check=True,
                 capture_output=True
             )
-            print("✅ Using existing multiplatform builder")
-
-        # Bootstrap the builder
-        subprocess.run(
-            ["docker", "buildx", "inspect", "--bootstrap"],
-            check=True,
-            capture_output=True
-        )
-        print("✅ Builder ready for multi-platform builds (linux/amd64, linux/arm64)")
+        messages.append("✅ Builder ready for multi-platform builds (linux/amd64, linux/arm64)")
+        return messages, None
     except Exception as e:
-        print(f"⚠️  Warning: Could not setup buildx builder: {e}")
-        print("Will attempt to continue with default builder")
+        return messages, e
 
-    # Check Docker login
+def check_login(report):
+    """Return True/False for the Docker Hub login, or None if unknown"""
     try:
-        result = subprocess.run(
-            ["docker", "info"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        if DOCKER_USER not in result.stdout:
-            print(f"\n⚠️  Not logged in to Docker Hub as {DOCKER_USER}")
-            print("Attempting to log in...")
-            subprocess.run(["docker", "login", "-u", DOCKER_USER], check=True)
-        else:
-            print(f"✅ Logged in to Docker Hub as {DOCKER_USER}")
+        with report.phase("login_check"):
+            result = subprocess.run(
+                ["docker", "info"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        return DOCKER_USER in result.stdout
     except:
+        return None
+
+def check_docker(report, use_cache=True):
+    """Check if Docker is running"""
+    print_header("Checking Prerequisites")
+
+    cached = load_prereq_cache("build") if use_cache else None
+    if cached:
+        age = time.time() - cached["checked_at"]
+        print(f"✅ Prerequisites verified {age:.0f}s ago - using cached result (--recheck to verify again)")
+        print(f"✅ Builder: {cached['builder']}")
+        print(f"✅ Logged in to Docker Hub as {DOCKER_USER}")
+        return
+
+    # The checks are independent, so run them concurrently; the builder
+    # bootstrap is by far the slowest and no longer blocks the others
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        docker_running = executor.submit(check_docker_running, report)
+        buildx_available = executor.submit(check_buildx, report)
+        builder = executor.submit(setup_builder, report)
+        logged_in = executor.submit(check_login, report)
+
+        # Check Docker
+        if not docker_running.result():
+            print("❌ Docker is not running or not installed")
+            print("Please start Docker Desktop and try again")
+            sys.exit(1)
+        print("✅ Docker is running")
+
+        # Check Docker buildx
+        if not buildx_available.result():
+            print("❌ Docker buildx is not available")
+            print("Please update Docker to a version that supports buildx")
+            sys.exit(1)
+        print("✅ Docker buildx is available")
+
+        # Setup buildx builder for multi-platform
+        print("\n▶ Setting up buildx builder for multi-platform builds")
+        messages, builder_error = builder.result()
+        for message in messages:
+            print(message)
+        if builder_error:
+            print(f"⚠️  Warning: Could not setup buildx builder: {builder_error}")
+            print("Will attempt to continue with default builder")
+
+        # Check Docker login
+        login_state = logged_in.result()
+
+    if login_state is None:
         print("⚠️  Could not verify Docker Hub login")
         print("You may need to run: docker login -u", DOCKER_USER)
+    elif not login_state:
+        print(f"\n⚠️  Not logged in to Docker Hub as {DOCKER_USER}")
+        print("Attempting to log in...")
+        try:
+            subprocess.run(["docker", "login", "-u", DOCKER_USER], check=True)
+            login_state = True
+        except:
+            print("⚠️  Could not verify Docker Hub login")
+            print("You may need to run: docker login -u", DOCKER_USER)
+    else:
+        print(f"✅ Logged in to Docker Hub as {DOCKER_USER}")
 
-def build_image(scenario_name, scenario_path):
-    """Build a multi-platform Docker image using buildx"""
-    image_name = f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}"
+    # Only a fully validated setup is worth caching
+    if not builder_error and login_state:
+        save_prereq_cache("build", {"builder": BUILDER_NAME})
+
+def get_build_context(scenario_path):
+    """Return the absolute path of a scenario's build context"""
+    script_dir = Path(__file__).parent
+    repo_root = script_dir.parent
+    return repo_root / "scenarios" / scenario_path
+
+def hash_build_context(build_context, extra_inputs=()):
+    """Hash every file in a build context (Dockerfile, app.py, anything COPY'd)"""
+    digest = hashlib.sha256()
+    # Tags are part of the hash so bumping VERSION forces a rebuild
+    digest.update(f"{DOCKER_USER}/{REPO_PREFIX}:{VERSION}\n".encode())
+    # Anything else the image is built from, e.g. the shared base image
+    for value in extra_inputs:
+        digest.update(f"{value}\n".encode())
+
+    for path in sorted(build_context.rglob("*")):
+        relative = path.relative_to(build_context)
+        if not path.is_file() or HASH_IGNORE.intersection(relative.parts):
+            continue
+        if path.suffix in (".pyc", ".pyo"):
+            continue
+        digest.update(f"{relative.as_posix()}\0".encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+    return digest.hexdigest()
+
+class BuildState:
+    """Build-state manifest recording what was last pushed for each scenario"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.images = {}
+        if self.path.exists():
+            try:
+                self.images = json.loads(self.path.read_text()).get("images", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable build state {self.path}: {e}")
+
+    def is_current(self, scenario_name, context_hash):
+        """True if the scenario was already pushed from identical sources"""
+        with self.lock:
+            entry = self.images.get(scenario_name, {})
+        return entry.get("context_hash") == context_hash and bool(entry.get("digest"))
+
+    def record(self, scenario_name, context_hash, digest):
+        """Record a successful push and save the manifest immediately"""
+        with self.lock:
+            self.images[scenario_name] = {
+                "context_hash": context_hash,
+                "digest": digest,
+                "version": VERSION,
+                "pushed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            # Write to a temp file and rename so an interrupted run never
+            # leaves a truncated manifest behind
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps({"images": self.images}, indent=2, sort_keys=True) + "\n")
+            os.replace(tmp_path, self.path)
+
+def read_pushed_digest(metadata_file):
+    """Read the pushed image digest from a buildx --metadata-file"""
+    try:
+        with open(metadata_file) as f:
+            return json.load(f).get("containerimage.digest")
+    except (OSError, ValueError):
+        return None
+
+def count_cache_hits(lines):
+    """Return (cached steps, total steps) from buildx plain progress output
+
+    FROM steps are left out: pulling a base image is never a rebuild.
+    """
+    steps = set()
+    cached = set()
+    for _, text in lines:
+        match = STEP_LINE.match(text)
+        if match and match.group(2) != "FROM":
+            steps.add(match.group(1))
+            continue
+        match = CACHED_LINE.match(text)
+        if match:
+            cached.add(match.group(1))
+    return len(steps & cached), len(steps)
+
+class BuildCache:
+    """BuildKit layer cache imported and exported per scenario
+
+    The cache lives either in a local directory (one subdirectory per
+    scenario, e.g. restored by the CI cache between runs) or in a registry
+    (one tag per scenario). Cache hit ratios are collected for every build,
+    with or without a persistent cache.
+    """
+
+    def __init__(self, directory=None, ref=None):
+        self.directory = Path(directory).expanduser().resolve() if directory else None
+        self.ref = ref
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    @staticmethod
+    def key(name):
+        """Cache key of a job name; usable as a directory name and a tag"""
+        return name.replace(":", "-")
+
+    def options(self, name, export=True):
+        """Return (cache-from, cache-to) buildx values for a job, or (None, None)"""
+        key = self.key(name)
+        if self.directory:
+            source = self.directory / key
+            # buildx refuses to import from a local cache that does not exist yet
+            cache_from = f"type=local,src={source}" if (source / "index.json").exists() else None
+            # Export next to the old cache and swap afterwards, so stale
+            # blobs don't pile up in the directory forever
+            cache_to = f"type=local,dest={source}.new,mode=max" if export else None
+            return cache_from, cache_to
+        if self.ref:
+            cache_from = f"type=registry,ref={self.ref}:{key}"
+            cache_to = f"type=registry,ref={self.ref}:{key},mode=max" if export else None
+            return cache_from, cache_to
+        return None, None
+
+    def finish(self, name, result):
+        """Record the hit ratio of a build and move a freshly exported local cache into place"""
+        cached, steps = count_cache_hits(result.lines)
+        with self.lock:
+            self.stats[name] = {"cached_steps": cached, "steps": steps}
+
+        if not self.directory:
+            return
+        target = self.directory / self.key(name)
+        exported = target.with_name(target.name + ".new")
+        if result and exported.exists():
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(exported, target)
+        else:
+            shutil.rmtree(exported, ignore_errors=True)
+
+    def summary(self):
+        """Return {job name: {cached_steps, steps, hit_ratio}}"""
+        with self.lock:
+            return {
+                name: dict(entry, hit_ratio=round(entry["cached_steps"] / entry["steps"], 3) if entry["steps"] else None)
+                for name, entry in self.stats.items()
+            }
+
+def parse_dockerfile(build_context):
+    """Return (base image, pip packages) from a scenario's Dockerfile"""
+    base_image = None
+    packages = []
+    dockerfile = build_context / "Dockerfile"
+    if not dockerfile.exists():
+        return None, []
+
+    for line in dockerfile.read_text().splitlines():
+        words = line.split()
+        if not words:
+            continue
+        instruction = words[0].upper()
+        if instruction == "FROM" and base_image is None:
+            base_image = words[1]
+        elif instruction == "RUN" and words[1:4] == ["pip", "install", "--no-cache-dir"]:
+            packages.extend(words[4:])
+    return base_image, packages
+
+def detect_shared_base(scenarios):
+    """Find the FROM image and pip packages shared by most scenario images
+
+    Returns a dict describing the shared base image, or None when fewer than
+    two scenarios share a common prefix worth building once.
+    """
+    parsed = {}
+    for scenario_name, scenario_path in scenarios:
+        base_image, packages = parse_dockerfile(get_build_context(scenario_path))
+        if base_image and packages:
+            parsed[scenario_name] = (base_image, packages)
+
+    by_base = {}
+    for scenario_name, (base_image, _) in parsed.items():
+        by_base.setdefault(base_image, []).append(scenario_name)
+    if not by_base:
+        return None
+
+    from_image, dependents = max(by_base.items(), key=lambda item: len(item[1]))
+    shared = set(parsed[dependents[0]][1])
+    for scenario_name in dependents[1:]:
+        shared &= set(parsed[scenario_name][1])
+    if len(dependents) < 2 or not shared:
+        return None
+
+    # Keep the packages in the order the Dockerfiles list them
+    packages = [pkg for pkg in parsed[dependents[0]][1] if pkg in shared]
+    dockerfile = (
+        f"FROM {from_image}\n"
+        f"WORKDIR /app\n"
+        f"RUN pip install --no-cache-dir {' '.join(packages)}\n"
+    )
+    # Tag the base by content so a changed package list never reuses a stale base
+    content_hash = hashlib.sha256(dockerfile.encode()).hexdigest()
+    return {
+        "from": from_image,
+        "packages": packages,
+        "dependents": dependents,
+        "dockerfile": dockerfile,
+        "ref": f"{DOCKER_USER}/{REPO_PREFIX}-base:{VERSION}-{content_hash[:12]}",
+        "hash": content_hash,
+    }
+
+def build_shared_base(base, state, report, force=False, prefix=None, cache=None):
+    """Build and push the shared workshop base image once for all platforms"""
+    log(f"\n🧱 Shared base image: {base['ref']}\n" + "-" * 60, prefix)
+    log(f"   FROM {base['from']} + pip install {' '.join(base['packages'])}", prefix)
+    log(f"   Used by: {', '.join(base['dependents'])}", prefix)
+
+    if not force and state.is_current("base", base["hash"]):
+        log("⏭️  Shared base image is unchanged since its last push - skipping\n", prefix)
+        report.record_image("base", SKIPPED)
+        return SKIPPED
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        build_context = Path(tmp_dir)
+        (build_context / "Dockerfile").write_text(base["dockerfile"])
+        metadata_file = build_context / "metadata.json"
+
+        cache_from, cache_to = cache.options("base") if cache else (None, None)
+        build_cmd = buildx_command([base["ref"]], build_context, metadata_file,
+                                   cache_from=cache_from, cache_to=cache_to)
+        result = run_command(build_cmd, "Building and pushing shared base image (multi-platform)", prefix)
+        if cache:
+            cache.finish("base", result)
+        build_seconds, push_seconds = split_build_push(result)
+        report.record_image("base", BUILT if result else FAILED, build_seconds, push_seconds, result.duration)
+        if not result:
+            return FAILED
+        digest = read_pushed_digest(metadata_file)
+
+    if digest:
+        state.record("base", base["hash"], digest)
+    return BUILT
+
+def buildx_command(tags, build_context, metadata_file=None, build_contexts=None,
+                   platforms=PLATFORMS, builder=None, push=True, cache_from=None, cache_to=None):
+    """Assemble a docker buildx build command (pushing unless push=False)"""
+    # By default this builds for both linux/amd64 and linux/arm64 and pushes directly
+    cmd = 'docker buildx build '
+    if builder:
+        cmd += f'--builder "{builder}" '
+    cmd += (
+        f'--platform {",".join(platforms)} '
+        f'--progress plain '
+    )
+    for tag in tags:
+        cmd += f'-t "{tag}" '
+    # Named contexts replace FROM images, e.g. python:3.11-alpine -> shared base
+    for name, source in (build_contexts or {}).items():
+        cmd += f'--build-context "{name}={source}" '
+    # Persistent layer cache, so a fresh builder (e.g. on CI) starts warm
+    if cache_from:
+        cmd += f'--cache-from "{cache_from}" '
+    if cache_to:
+        cmd += f'--cache-to "{cache_to}" '
+    # Without --push the result only stays in the builder's cache, from
+    # where a later identical command with --push uploads it
+    if push:
+        cmd += '--push '
+    if metadata_file:
+        cmd += f'--metadata-file "{metadata_file}" '
+    cmd += f'"{build_context}"'
+    return cmd
+
+def get_image_name(scenario_name):
+    """Return the Docker Hub repository of a scenario image"""
+    return f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}"
+
+def get_platform_tag(scenario_name, platform):
+    """Per-architecture tag used by --split-platforms, e.g. webapp:v1.0-arm64"""
+    return f"{get_image_name(scenario_name)}:{VERSION}-{platform.split('/')[-1]}"
+
+def build_image(scenario_name, scenario_path, prefix=None, metadata_file=None, build_contexts=None,
+                platform=None, builder=None, push=True, retries=0, action=None, cache=None,
+                cache_export=True):
+    """Build a multi-platform Docker image (or a single platform of it) using buildx
+
+    With a cache, layers are imported from and (if cache_export) exported to
+    the persistent cache. --pipeline push jobs pass cache_export=False: they
+    repeat a finished build, so every step is a hit by design.
+    """
+    image_name = get_image_name(scenario_name)
     tag_v1 = f"{image_name}:{VERSION}"
     tag_latest = f"{image_name}:latest"
 
     # Get absolute path
-    script_dir = Path(__file__).parent
-    repo_root = script_dir.parent
-    build_context = repo_root / "scenarios" / scenario_path
+    build_context = get_build_context(scenario_path)
 
     if not build_context.exists():
-        print(f"❌ Directory not found: {build_context}")
-        return False
+        log(f"❌ Directory not found: {build_context}", prefix)
+        return CommandResult(False)
 
-    # Build and push command using buildx for multi-platform support
-    # This builds for both linux/amd64 and linux/arm64 and pushes directly
-    build_cmd = (
-        f'docker buildx build '
-        f'--platform linux/amd64,linux/arm64 '
-        f'-t "{tag_v1}" '
-        f'-t "{tag_latest}" '
-        f'--push '
-        f'"{build_context}"'
-    )
+    action = action or ("Building and pushing" if push else "Building")
+    job_name = f"{scenario_name}:{platform.split('/')[-1]}" if platform else scenario_name
+    cache_from, cache_to = cache.options(job_name, cache_export) if cache else (None, None)
+    if platform:
+        # One architecture only, pushed under its own tag for a later merge
+        build_cmd = buildx_command([get_platform_tag(scenario_name, platform)], build_context,
+                                   metadata_file, build_contexts, [platform], builder, push,
+                                   cache_from, cache_to)
+        description = f"{action} {scenario_name} ({platform})"
+    else:
+        # Build and push command using buildx for multi-platform support
+        build_cmd = buildx_command([tag_v1, tag_latest], build_context, metadata_file, build_contexts,
+                                   push=push, cache_from=cache_from, cache_to=cache_to)
+        description = f"{action} {scenario_name} (multi-platform)"
+
+    result = run_with_retry(build_cmd, description, prefix, retries)
+    if cache and cache_export:
+        cache.finish(job_name, result)
+    return result
+
+def get_remote_manifest(ref):
+    """Return the raw manifest (or manifest list) of a pushed image, or None"""
+    try:
+        result = subprocess.run(
+            ["docker", "buildx", "imagetools", "inspect", "--raw", ref],
+            capture_output=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def get_remote_digest(ref):
+    """Return the registry digest of a pushed image or manifest list"""
+    raw = get_remote_manifest(ref)
+    if raw is None:
+        return None
+    # The registry digest is the SHA-256 of the raw manifest bytes
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+def get_remote_image_configs(ref):
+    """Return {platform: image config} of a pushed image; used for layer history"""
+    try:
+        result = subprocess.run(
+            ["docker", "buildx", "imagetools", "inspect", "--format", "{{json .Image}}", ref],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        configs = json.loads(result.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return {}
+    # Single-platform images return the config itself rather than a map
+    if "history" in configs or "rootfs" in configs:
+        platform = f"{configs.get('os', 'linux')}/{configs.get('architecture', 'amd64')}"
+        return {platform: configs}
+    return configs
+
+def layer_commands(config):
+    """Dockerfile instruction that created each layer, in layer order"""
+    commands = []
+    for entry in config.get("history", []):
+        if entry.get("empty_layer"):
+            continue
+        command = entry.get("created_by", "")
+        command = command.replace("/bin/sh -c #(nop) ", "").replace("/bin/sh -c ", "RUN ")
+        command = re.sub(r"\s+# buildkit$", "", command).strip()
+        commands.append(" ".join(command.split()))
+    return commands
+
+def analyze_image(scenario_name):
+    """Compressed size, layer count and layers of every platform of a pushed image"""
+    ref = f"{get_image_name(scenario_name)}:{VERSION}"
+    raw = get_remote_manifest(ref)
+    if raw is None:
+        return None
+    try:
+        index = json.loads(raw)
+    except ValueError:
+        return None
+
+    entries = index.get("manifests") or [{"digest": None, "platform": {"os": "linux", "architecture": "amd64"}}]
+    configs = get_remote_image_configs(ref)
+    platforms = {}
+    for entry in entries:
+        platform = f"{entry.get('platform', {}).get('os')}/{entry.get('platform', {}).get('architecture')}"
+        if platform not in PLATFORMS:
+            # Attestation manifests ("unknown/unknown") are not images
+            continue
+        manifest = index
+        if entry["digest"]:
+            manifest_raw = get_remote_manifest(f"{get_image_name(scenario_name)}@{entry['digest']}")
+            try:
+                manifest = json.loads(manifest_raw) if manifest_raw else None
+            except ValueError:
+                manifest = None
+        if not manifest:
+            continue
+
+        commands = layer_commands(configs.get(platform, {}))
+        layers = []
+        for i, layer in enumerate(manifest.get("layers", [])):
+            layers.append({
+                "digest": layer.get("digest"),
+                "size": layer.get("size", 0),
+                # History and layers line up unless the history is incomplete
+                "created_by": commands[i] if len(commands) == len(manifest.get("layers", [])) else f"layer {i + 1}",
+            })
+        platforms[platform] = {
+            "compressed_bytes": sum(layer["size"] for layer in layers) + manifest.get("config", {}).get("size", 0),
+            "layer_count": len(layers),
+            "layers": layers,
+        }
+
+    if not platforms:
+        return None
+    return {
+        "digest": "sha256:" + hashlib.sha256(raw).hexdigest(),
+        "compressed_bytes": max(entry["compressed_bytes"] for entry in platforms.values()),
+        "platforms": platforms,
+    }
+
+def diff_layers(old_layers, new_layers):
+    """Return (change, created_by, old size, new size) for layers that differ
+
+    Layers with the same digest are unchanged. A new layer created by the same
+    instruction as an old one, or else at the same position (an edited
+    instruction), counts as changed; everything else as added or removed.
+    Sorted by the size difference, largest first.
+    """
+    old_digests = {layer["digest"] for layer in old_layers}
+    new_digests = {layer["digest"] for layer in new_layers}
+    unmatched = [layer for layer in old_layers if layer["digest"] not in new_digests]
+    new_unmatched = [layer for layer in new_layers if layer["digest"] not in old_digests]
+
+    def same_position(old, new):
+        return (old_layers.index(old) == new_layers.index(new)
+                and not any(other["created_by"] == new["created_by"] for other in unmatched)
+                and not any(other["created_by"] == old["created_by"] for other in new_unmatched))
+
+    changes = []
+    for layer in new_unmatched:
+        previous = next((old for old in unmatched if old["created_by"] == layer["created_by"]), None)
+        if not previous:
+            previous = next((old for old in unmatched if same_position(old, layer)), None)
+        if previous:
+            unmatched.remove(previous)
+            changes.append(("changed", layer["created_by"], previous["size"], layer["size"]))
+        else:
+            changes.append(("added", layer["created_by"], 0, layer["size"]))
+    for layer in unmatched:
+        changes.append(("removed", layer["created_by"], layer["size"], 0))
+    return sorted(changes, key=lambda change: abs(change[3] - change[2]), reverse=True)
+
+def load_budgets(path):
+    """Read the size budget file: {"default": {...}, "images": {name: {"warn_mb", "fail_mb"}}}"""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable size budget file {path}: {e}")
+        return {}
+
+def check_budget(scenario_name, compressed_bytes, budgets):
+    """Return ("ok" | "warn" | "fail", limit in MB) for an image's compressed size"""
+    budget = dict(budgets.get("default", {}), **budgets.get("images", {}).get(scenario_name, {}))
+    size_mb = compressed_bytes / (1024 * 1024)
+    if budget.get("fail_mb") is not None and size_mb > budget["fail_mb"]:
+        return "fail", budget["fail_mb"]
+    if budget.get("warn_mb") is not None and size_mb > budget["warn_mb"]:
+        return "warn", budget["warn_mb"]
+    return "ok", budget.get("warn_mb")
+
+def report_sizes(scenario_names, built, history, budgets, jobs):
+    """Print and budget-check the image sizes; returns (report entries, over-budget names)
 
-    return run_command(build_cmd, f"Building and pushing {scenario_name} (multi-platform)")
+    Only the images in `built` are read back from the registry. The others
+    were skipped as unchanged, so their last stored analysis is reported.
+    """
+    print_header("Image Sizes")
+    to_analyze = [name for name in scenario_names if name in built]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        analyses = dict(zip(to_analyze, executor.map(analyze_image, to_analyze)))
+
+    entries = {}
+    over_budget = []
+    print(f"  {'Image':<16} " + " ".join(f"{platform:>13}" for platform in PLATFORMS) + f" {'Layers':>7}  Budget")
+    for scenario_name in scenario_names:
+        unchanged = scenario_name not in built
+        analysis = history.previous(scenario_name) if unchanged else analyses[scenario_name]
+        if not analysis:
+            if not unchanged:
+                print(f"  {scenario_name:<16} ⚠️  could not read the image from the registry")
+            continue
+        status, limit = check_budget(scenario_name, analysis["compressed_bytes"], budgets)
+        if status == "fail":
+            over_budget.append(scenario_name)
+        sizes = " ".join(
+            f"{format_size(analysis['platforms'][platform]['compressed_bytes']) if platform in analysis['platforms'] else '-':>13}"
+            for platform in PLATFORMS
+        )
+        layer_count = max(entry["layer_count"] for entry in analysis["platforms"].values())
+        budget = {"ok": "✅", "warn": "⚠️  over", "fail": "❌ over"}[status]
+        budget += f" {limit} MB" if limit is not None else ""
+        budget += " (unchanged)" if unchanged else ""
+        print(f"  {scenario_name:<16} {sizes} {layer_count:>7}  {budget}")
+        entries[scenario_name] = {
+            "digest": analysis["digest"],
+            "compressed_bytes": analysis["compressed_bytes"],
+            "budget": status,
+            "unchanged": unchanged,
+            "platforms": {
+                platform: {
+                    "compressed_bytes": entry["compressed_bytes"],
+                    "layer_count": entry["layer_count"],
+                    "largest_layers": sorted(entry["layers"], key=lambda layer: layer["size"],
+                                             reverse=True)[:LARGEST_LAYERS],
+                }
+                for platform, entry in analysis["platforms"].items()
+            },
+        }
+
+    # Largest layers of the native platform show where the bytes go
+    print(f"\n  Largest layers ({PLATFORMS[0]}):")
+    for scenario_name, entry in entries.items():
+        layers = entry["platforms"].get(PLATFORMS[0], {}).get("largest_layers", [])
+        if layers:
+            print(f"  {scenario_name}:")
+        for layer in layers:
+            print(f"    {format_size(layer['size']):>9}  {layer['created_by'][:70]}")
+
+    # Per-layer diff against the previous analysis for images that changed
+    diffs_shown = False
+    for scenario_name, analysis in analyses.items():
+        previous = history.previous(scenario_name)
+        if not analysis or not previous or previous.get("digest") == analysis["digest"]:
+            continue
+        for platform, entry in analysis["platforms"].items():
+            old = previous.get("platforms", {}).get(platform)
+            if not old:
+                continue
+            changes = diff_layers(old["layers"], entry["layers"])
+            delta = entry["compressed_bytes"] - old["compressed_bytes"]
+            entries[scenario_name].setdefault("diff", {})[platform] = {
+                "delta_bytes": delta,
+                "layers": [
+                    {"change": change, "created_by": created_by, "old_size": old_size, "new_size": new_size}
+                    for change, created_by, old_size, new_size in changes
+                ],
+            }
+            if not diffs_shown:
+                print("\n  Changes since the previous build:")
+                diffs_shown = True
+            sign = "+" if delta >= 0 else "-"
+            print(f"  {scenario_name} ({platform}): {format_size(old['compressed_bytes'])} → "
+                  f"{format_size(entry['compressed_bytes'])} ({sign}{format_size(abs(delta))})")
+            for change, created_by, old_size, new_size in changes:
+                marker = {"added": "+", "removed": "-", "changed": "~"}[change]
+                print(f"    {marker} {format_size(old_size):>9} → {format_size(new_size):>9}  {created_by[:60]}")
+
+    history.save({name: analysis for name, analysis in analyses.items() if analysis})
+    return entries, over_budget
+
+class SizeHistory:
+    """Last size analysis of every image, kept to diff layers against the next build"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.images = {}
+        if self.path.exists():
+            try:
+                self.images = json.loads(self.path.read_text()).get("images", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable size history {self.path}: {e}")
+
+    def previous(self, scenario_name):
+        return self.images.get(scenario_name)
+
+    def save(self, analyses):
+        """Store the given analyses and write the file"""
+        for scenario_name, analysis in analyses.items():
+            self.images[scenario_name] = dict(
+                analysis, analyzed_at=datetime.now(timezone.utc).isoformat(timespec="seconds")
+            )
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"images": self.images}, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_path, self.path)
+
+def merge_platform_images(scenario_name, prefix=None):
+    """Assemble the per-architecture tags into the multi-arch manifest list"""
+    image_name = get_image_name(scenario_name)
+    cmd = (
+        f'docker buildx imagetools create '
+        f'-t "{image_name}:{VERSION}" '
+        f'-t "{image_name}:latest" '
+    )
+    cmd += " ".join(f'"{get_platform_tag(scenario_name, platform)}"' for platform in PLATFORMS)
+    return run_command(cmd, f"Creating multi-arch manifest list for {scenario_name}", prefix)
 
 def push_image(scenario_name):
     """Push a Docker image to Docker Hub"""
@@ -177,50 +1096,604 @@ def push_image(scenario_name):
     push_cmd_latest = f'docker push "{image_name}:latest"'
     return run_command(push_cmd_latest, f"Pushing {scenario_name}:latest")
 
+def get_scenario_inputs(scenario_path, base=None, prefix=None):
+    """Return (buildx named contexts, content hash) for a scenario build"""
+    build_contexts = None
+    extra_inputs = ()
+    if base:
+        # Resolve FROM <python image> to the prebuilt base so the shared
+        # pip install is not repeated (under QEMU for arm64) in every image
+        build_contexts = {base["from"]: f"docker-image://{base['ref']}"}
+        extra_inputs = (base["ref"],)
+        log(f"   Using shared base image {base['ref']}", prefix)
+
+    build_context = get_build_context(scenario_path)
+    context_hash = hash_build_context(build_context, extra_inputs) if build_context.exists() else None
+    return build_contexts, context_hash
+
+def process_platform(idx, total, scenario_name, scenario_path, platform, state, report,
+                     force=False, prefix=None, base=None, builder=None, push=True, cache=None):
+    """Build and push one architecture of a scenario under its per-arch tag"""
+    job_name = f"{scenario_name}:{platform.split('/')[-1]}"
+    log(f"\n[{idx}/{total}] Processing: {scenario_name} ({platform})\n" + "-" * 60, prefix)
+
+    build_contexts, context_hash = get_scenario_inputs(scenario_path, base, prefix)
+
+    if context_hash and not force and state.is_current(scenario_name, context_hash):
+        log(f"⏭️  {scenario_name} is unchanged since its last push - skipping (use --force to rebuild)\n", prefix)
+        report.record_image(job_name, SKIPPED)
+        return SKIPPED
+
+    start = time.monotonic()
+    result = build_image(scenario_name, scenario_path, prefix, None, build_contexts, platform, builder, push,
+                         cache=cache)
+    if not push:
+        report.record_image(job_name, BUILT if result else FAILED, build_seconds=result.duration)
+        report.record_stage("build", start, result.duration)
+        return BUILT if result else FAILED
+
+    build_seconds, push_seconds = split_build_push(result)
+    report.record_image(job_name, BUILT if result else FAILED, build_seconds, push_seconds, result.duration)
+    if not result:
+        log(f"⚠️  Build/push failed for {scenario_name} ({platform})\n", prefix)
+        return FAILED
+
+    # Ready for testing on this architecture before the other one finishes
+    log(f"✅ {get_platform_tag(scenario_name, platform)} is available\n", prefix)
+    return BUILT
+
+def process_merge(scenario_name, scenario_path, platform_results, state, report, prefix=None, base=None):
+    """Merge finished per-arch images into the VERSION and latest manifest list"""
+    if FAILED in platform_results:
+        log(f"⚠️  Not merging {scenario_name}: a platform build failed\n", prefix)
+        report.record_image(scenario_name, FAILED)
+        return FAILED
+    if all(result == SKIPPED for result in platform_results):
+        report.record_image(scenario_name, SKIPPED)
+        return SKIPPED
+
+    result = merge_platform_images(scenario_name, prefix)
+    report.record_image(scenario_name, BUILT if result else FAILED, None, result.duration, result.duration)
+    if not result:
+        log(f"⚠️  Manifest merge failed for {scenario_name}\n", prefix)
+        return FAILED
+
+    _, context_hash = get_scenario_inputs(scenario_path, base)
+    digest = get_remote_digest(f"{get_image_name(scenario_name)}:{VERSION}")
+    if digest and context_hash:
+        state.record(scenario_name, context_hash, digest)
+
+    log(f"✅ Successfully built and pushed {scenario_name} (multi-platform, split)\n", prefix)
+    return BUILT
+
+def process_scenario(idx, total, scenario_name, scenario_path, state, report, force=False, prefix=None,
+                     base=None, push=True, cache=None):
+    """Build and push one scenario, returning BUILT, SKIPPED or FAILED"""
+    log(f"\n[{idx}/{total}] Processing: {scenario_name}\n" + "-" * 60, prefix)
+
+    build_contexts, context_hash = get_scenario_inputs(scenario_path, base, prefix)
+
+    if context_hash and not force and state.is_current(scenario_name, context_hash):
+        log(f"⏭️  {scenario_name} is unchanged since its last push - skipping (use --force to rebuild)\n", prefix)
+        report.record_image(scenario_name, SKIPPED)
+        return SKIPPED
+
+    if not push:
+        # --pipeline: build into the builder cache; a push job uploads it later
+        start = time.monotonic()
+        result = build_image(scenario_name, scenario_path, prefix, None, build_contexts, push=False, cache=cache)
+        report.record_image(scenario_name, BUILT if result else FAILED, build_seconds=result.duration)
+        report.record_stage("build", start, result.duration)
+        if not result:
+            log(f"⚠️  Build failed for {scenario_name}\n", prefix)
+            return FAILED
+        log(f"🏗️  Built {scenario_name} - queued for push\n", prefix)
+        return BUILT
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        metadata_file = Path(tmp_dir) / "metadata.json"
+
+        # Build and push (buildx does both in one step)
+        result = build_image(scenario_name, scenario_path, prefix, metadata_file, build_contexts, cache=cache)
+        build_seconds, push_seconds = split_build_push(result)
+        report.record_image(scenario_name, BUILT if result else FAILED,
+                            build_seconds, push_seconds, result.duration)
+        if not result:
+            log(f"⚠️  Build/push failed for {scenario_name}\n", prefix)
+            return FAILED
+
+        digest = read_pushed_digest(metadata_file)
+
+    if digest:
+        state.record(scenario_name, context_hash, digest)
+    else:
+        log(f"⚠️  Could not read pushed digest for {scenario_name}; it will be rebuilt next run", prefix)
+
+    log(f"✅ Successfully built and pushed {scenario_name} (multi-platform)\n", prefix)
+    return BUILT
+
+def process_push(scenario_name, scenario_path, build_result, state, report, retries=0,
+                 prefix=None, base=None, platform=None, builder=None, cache=None):
+    """Push an image built by an earlier build-only job (--pipeline mode)"""
+    if build_result != BUILT:
+        # Skipped or failed builds have nothing to push
+        return build_result
+
+    job_name = scenario_name if platform is None else f"{scenario_name}:{platform.split('/')[-1]}"
+    build_contexts, context_hash = get_scenario_inputs(scenario_path, base)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        metadata_file = None if platform else Path(tmp_dir) / "metadata.json"
+
+        # Same command as the build job plus --push: every step is a cache
+        # hit, so this only exports and uploads the image
+        start = time.monotonic()
+        result = build_image(scenario_name, scenario_path, prefix, metadata_file, build_contexts,
+                             platform, builder, push=True, retries=retries, action="Pushing",
+                             cache=cache, cache_export=False)
+        report.record_image(job_name, BUILT if result else FAILED, push_seconds=time.monotonic() - start)
+        report.record_stage("push", start, time.monotonic() - start)
+        if not result:
+            log(f"⚠️  Push failed for {job_name}\n", prefix)
+            return FAILED
+
+        digest = read_pushed_digest(metadata_file) if metadata_file else None
+
+    if platform:
+        log(f"✅ {get_platform_tag(scenario_name, platform)} is available\n", prefix)
+        return BUILT
+
+    if digest and context_hash:
+        state.record(scenario_name, context_hash, digest)
+    log(f"✅ Successfully built and pushed {scenario_name} (multi-platform)\n", prefix)
+    return BUILT
+
+def git_changed_paths(since):
+    """Return repo-relative paths changed since a git ref, including uncommitted and untracked files"""
+    repo_root = Path(__file__).parent.parent
+    changed = set()
+    for cmd in (
+        ["git", "-C", str(repo_root), "diff", "--name-only", since, "--"],
+        ["git", "-C", str(repo_root), "ls-files", "--others", "--exclude-standard"],
+    ):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ValueError(result.stderr.strip() or f"git failed for ref {since!r}")
+        changed.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return changed
+
+def select_scenarios(only=None, since=None):
+    """Return the SCENARIOS entries selected by --only and --since"""
+    selected = list(SCENARIOS)
+
+    if only:
+        names = [name.strip() for name in only.split(",") if name.strip()]
+        known = {scenario_name for scenario_name, _ in SCENARIOS}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown scenario(s): {', '.join(unknown)} (choose from: {', '.join(sorted(known))})")
+        selected = [entry for entry in selected if entry[0] in names]
+
+    if since:
+        changed = git_changed_paths(since)
+        selected = [
+            (scenario_name, scenario_path)
+            for scenario_name, scenario_path in selected
+            if any(path.startswith(f"scenarios/{scenario_path}/") for path in changed)
+        ]
+
+    return selected
+
+def run_build_graph(jobs, pool_sizes):
+    """Run build jobs in dependency order, with a bounded worker pool per stage
+
+    jobs maps a job name to (dependencies, function, pool). Each function is
+    called with a dict of its dependencies' results once they have all
+    finished, and returns BUILT, SKIPPED or FAILED. pool_sizes maps each pool
+    name (e.g. "build", "push") to its number of workers. Independent jobs
+    start in the order they were added. Returns a dict of job name -> result.
+    """
+    results = {}
+    pending = dict(jobs)
+    running = {}
+    executors = {pool: ThreadPoolExecutor(max_workers=size) for pool, size in pool_sizes.items()}
+
+    try:
+        while pending or running:
+            for name, (dependencies, function, pool) in list(pending.items()):
+                if all(dep in results for dep in dependencies):
+                    del pending[name]
+                    dep_results = {dep: results[dep] for dep in dependencies}
+                    running[executors[pool].submit(function, dep_results)] = name
+
+            if not running:
+                raise RuntimeError(f"Unresolvable build dependencies: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    return results
+
+def usable_base(base, dep_results, prefix=None):
+    """Return the shared base unless its build failed"""
+    if base and dep_results.get("base") == FAILED:
+        log("⚠️  Shared base image failed - building from the original FROM image", prefix)
+        return None
+    return base
+
+def make_scenario_jobs(idx, total, scenario_name, scenario_path, state, report, args, base=None, cache=None):
+    """Return the build-graph jobs for one scenario
+
+    Normally this is a single multi-platform build. With --split-platforms
+    every platform is a separate job and a final job merges their tags. With
+    --pipeline every build is followed by a push job in the push pool.
+    """
+    dependencies = ["base"] if base else []
+    build_only = not args.pipeline
+
+    def prefix_for(job_name):
+        return job_name if args.prefix_output else None
+
+    def add_push_job(jobs, build_name, push_name, platform=None):
+        def push_job(dep_results):
+            return process_push(scenario_name, scenario_path, dep_results[build_name], state, report,
+                                args.push_retries, prefix_for(push_name), usable_base(base, dep_results),
+                                platform, args.platform_builders.get(platform), cache)
+
+        jobs[push_name] = (dependencies + [build_name], push_job, "push")
+
+    if not args.split_platforms:
+        build_name = f"{scenario_name} (build)" if args.pipeline else scenario_name
+
+        def job(dep_results):
+            prefix = prefix_for(scenario_name)
+            return process_scenario(idx, total, scenario_name, scenario_path, state, report,
+                                    args.force, prefix, usable_base(base, dep_results, prefix),
+                                    push=build_only, cache=cache)
+
+        jobs = {build_name: (dependencies, job, "build")}
+        if args.pipeline:
+            add_push_job(jobs, build_name, scenario_name)
+        return jobs
+
+    jobs = {}
+    platform_jobs = []
+    for platform in PLATFORMS:
+        job_name = f"{scenario_name}:{platform.split('/')[-1]}"
+        build_name = f"{job_name} (build)" if args.pipeline else job_name
+
+        def platform_job(dep_results, platform=platform, prefix=prefix_for(job_name)):
+            return process_platform(idx, total, scenario_name, scenario_path, platform, state, report,
+                                    args.force, prefix, usable_base(base, dep_results, prefix),
+                                    args.platform_builders.get(platform), push=build_only, cache=cache)
+
+        jobs[build_name] = (dependencies, platform_job, "build")
+        if args.pipeline:
+            add_push_job(jobs, build_name, job_name, platform)
+        platform_jobs.append(job_name)
+
+    def merge_job(dep_results):
+        platform_results = [dep_results[name] for name in platform_jobs]
+        return process_merge(scenario_name, scenario_path, platform_results, state, report,
+                             prefix_for(scenario_name), usable_base(base, dep_results))
+
+    jobs[scenario_name] = (dependencies + platform_jobs, merge_job, "push" if args.pipeline else "build")
+    return jobs
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Build and push all K8s Workshop images (multi-platform)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="number of images to build concurrently (default: 1)"
+    )
+    parser.add_argument(
+        "--only",
+        metavar="NAME[,NAME]",
+        help="build only these scenarios, e.g. --only webapp,health-app"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="GIT_REF",
+        help="build only scenarios with files changed since this git ref (e.g. origin/main)"
+    )
+    parser.add_argument(
+        "--shared-base",
+        action="store_true",
+        help="build the common FROM + pip install prefix once as a shared base image"
+    )
+    parser.add_argument(
+        "--split-platforms",
+        action="store_true",
+        help="build each platform as a separate parallel job, then merge the manifest list"
+    )
+    parser.add_argument(
+        "--platform-builder",
+        dest="platform_builders",
+        action="append",
+        default=[],
+        metavar="PLATFORM=BUILDER",
+        help="with --split-platforms, use this buildx builder for one platform "
+             "(e.g. linux/amd64=default); may be repeated"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="build all images into the builder cache and push them from a separate worker pool"
+    )
+    parser.add_argument(
+        "--push-jobs",
+        type=int,
+        default=2,
+        help="with --pipeline, number of concurrent pushes (default: 2)"
+    )
+    parser.add_argument(
+        "--push-retries",
+        type=int,
+        default=3,
+        help="with --pipeline, retries for transient registry errors (default: 3)"
+    )
+    layer_cache = parser.add_mutually_exclusive_group()
+    layer_cache.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="import and export the BuildKit layer cache in this directory (one subdirectory per scenario)"
+    )
+    layer_cache.add_argument(
+        "--cache-ref",
+        metavar="REPOSITORY",
+        help="import and export the BuildKit layer cache as registry tags, e.g. localhost:5000/k8s-workshop-cache"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="rebuild every image, even if its sources are unchanged since the last push"
+    )
+    parser.add_argument(
+        "--state-file",
+        default=STATE_FILE,
+        help=f"build-state manifest used to skip unchanged images (default: {STATE_FILE.name})"
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="use the stand-in docker CLI from scripts/simulator (no daemon or registry needed)"
+    )
+    parser.add_argument(
+        "--recheck",
+        action="store_true",
+        help=f"ignore cached prerequisite checks (cached for {PREREQ_CACHE_TTL // 60} minutes)"
+    )
+    parser.add_argument(
+        "--report",
+        default=REPORT_FILE,
+        help=f"where to write the JSON timing report (default: scripts/{REPORT_FILE.name})"
+    )
+    parser.add_argument(
+        "--budget-file",
+        default=BUDGET_FILE,
+        help=f"compressed size budgets per image (default: scripts/{BUDGET_FILE.name})"
+    )
+    parser.add_argument(
+        "--no-size-report",
+        action="store_true",
+        help="skip the image size analysis and budget check after building"
+    )
+    parser.add_argument(
+        "--enforce-budgets",
+        action="store_true",
+        help="exit with an error when an image exceeds its fail_mb budget (default: only warn)"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="PREVIOUS_JSON",
+        help="flag images whose build or push time regressed against an earlier report"
+    )
+    parser.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown that counts as a regression (default: 0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--regression-min-seconds",
+        type=float,
+        default=5.0,
+        help="ignore slowdowns smaller than this many seconds (default: 5)"
+    )
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.push_jobs < 1:
+        parser.error("--push-jobs must be at least 1")
+    if args.push_retries < 0:
+        parser.error("--push-retries cannot be negative")
+    # Prefix output whenever more than one job can run at the same time
+    args.prefix_output = args.jobs > 1 or args.pipeline
+
+    platform_builders = {}
+    for value in args.platform_builders:
+        platform, _, builder = value.partition("=")
+        if platform not in PLATFORMS or not builder:
+            parser.error(f"--platform-builder expects PLATFORM=BUILDER with PLATFORM in {', '.join(PLATFORMS)}")
+        platform_builders[platform] = builder
+    if platform_builders and not args.split_platforms:
+        parser.error("--platform-builder requires --split-platforms")
+    args.platform_builders = platform_builders
+    return args
+
 def main():
     """Main build and push workflow"""
+    args = parse_args()
+    if args.simulate:
+        sim_dir = enable_simulation()
+        # Keep simulated runs away from the real build state and report
+        if Path(args.state_file) == STATE_FILE:
+            args.state_file = sim_dir / "build-state.json"
+        if Path(args.report) == REPORT_FILE:
+            args.report = sim_dir / "build-report.json"
+
+    try:
+        scenarios = select_scenarios(args.only, args.since)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
     print_header("K8s Workshop - Build and Push All Images")
     print(f"Docker User: {DOCKER_USER}")
     print(f"Version: {VERSION}")
-    print(f"Total Images: {len(SCENARIOS)}")
+    print(f"Total Images: {len(scenarios)}")
+    print(f"Parallel Jobs: {args.jobs}")
+    if args.pipeline:
+        print(f"Push Jobs: {args.push_jobs} (pipelined, {args.push_retries} retries)")
+    if args.cache_dir or args.cache_ref:
+        print(f"Layer Cache: {args.cache_dir or args.cache_ref}")
+    if args.simulate:
+        print(f"🧪 SIMULATION: using {SIMULATOR_DIR / 'docker'} (state in {sim_dir})")
+    if args.only or args.since:
+        print(f"Selected: {', '.join(name for name, _ in scenarios) or 'none'}")
+
+    if not scenarios:
+        print(f"\n✅ No scenarios changed since {args.since} - nothing to build")
+        return
+
+    state = BuildState(args.state_file)
+    report = RunReport()
+    cache = BuildCache(args.cache_dir, args.cache_ref)
+
+    # Read the baseline first: --compare may point at the file we overwrite
+    previous = None
+    if args.compare:
+        try:
+            previous = json.loads(Path(args.compare).read_text())
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read {args.compare} for comparison: {e}")
 
     # Check prerequisites
-    check_docker()
+    with report.phase("check_docker"):
+        check_docker(report, use_cache=not args.recheck)
 
     # Build and push all images
     print_header("Building and Pushing Images")
 
-    success_count = 0
-    failed_scenarios = []
+    # Scenarios sharing the base image wait for it; everything else starts
+    # straight away, so jobs run in topological order of the build graph
+    base = detect_shared_base(scenarios) if args.shared_base else None
+    jobs = {}
+    if base:
+        base_prefix = "base" if args.prefix_output else None
+        jobs["base"] = ([], lambda _: build_shared_base(base, state, report, args.force, base_prefix, cache), "build")
 
-    for idx, (scenario_name, scenario_path) in enumerate(SCENARIOS, 1):
-        print(f"\n[{idx}/{len(SCENARIOS)}] Processing: {scenario_name}")
-        print("-" * 60)
+    for idx, (scenario_name, scenario_path) in enumerate(scenarios, 1):
+        depends_on_base = base is not None and scenario_name in base["dependents"]
+        jobs.update(make_scenario_jobs(idx, len(scenarios), scenario_name, scenario_path, state,
+                                       report, args, base if depends_on_base else None, cache))
 
-        # Build and push (buildx does both in one step)
-        if not build_image(scenario_name, scenario_path):
-            failed_scenarios.append(scenario_name)
-            print(f"⚠️  Build/push failed for {scenario_name}\n")
-            continue
+    with report.phase("build_and_push"):
+        graph_results = run_build_graph(jobs, {"build": args.jobs, "push": args.push_jobs})
+    results = [graph_results[scenario_name] for scenario_name, _ in scenarios]
 
-        success_count += 1
-        print(f"✅ Successfully built and pushed {scenario_name} (multi-platform)\n")
+    # Size analytics: registry reads only for the images pushed in this run
+    over_budget = []
+    if not args.no_size_report:
+        reported = [name for (name, _), result in zip(scenarios, results) if result != FAILED]
+        built = {name for (name, _), result in zip(scenarios, results) if result == BUILT}
+        history = SizeHistory(Path(args.state_file).with_name(SIZES_FILE_NAME))
+        with report.phase("size_analysis"):
+            report.sizes, over_budget = report_sizes(reported, built, history,
+                                                     load_budgets(args.budget_file), args.jobs)
+
+    success_count = results.count(BUILT)
+    skipped_count = results.count(SKIPPED)
+    failed_scenarios = [
+        scenario_name
+        for (scenario_name, _), result in zip(scenarios, results)
+        if result == FAILED
+    ]
+
+    # Timing report
+    print_header("Timing Report")
+    for name, seconds in report.phases.items():
+        print(f"  {name:<24} {seconds:>8.1f}s")
+    print()
+    print(f"  {'Image':<20} {'Result':<8} {'Build':>9} {'Push':>9} {'Total':>9}")
+    image_order = ["base"] + list(jobs)
+    for name, timings in sorted(report.images.items(),
+                                key=lambda item: image_order.index(item[0]) if item[0] in image_order else len(image_order)):
+        columns = [
+            "-" if timings[key] is None else f"{timings[key]:.1f}s"
+            for key in ("build_seconds", "push_seconds", "total_seconds")
+        ]
+        print(f"  {name:<20} {timings['result']:<8} {columns[0]:>9} {columns[1]:>9} {columns[2]:>9}")
+
+    # Layer cache hit ratios of the builds that ran
+    report.cache = cache.summary()
+    if report.cache:
+        print()
+        print(f"  {'Layer cache':<20} {'Cached':>8} {'Steps':>6} {'Hits':>6}")
+        for name in sorted(report.cache, key=lambda n: image_order.index(n) if n in image_order else len(image_order)):
+            entry = report.cache[name]
+            ratio = "-" if entry["hit_ratio"] is None else f"{entry['hit_ratio'] * 100:.0f}%"
+            print(f"  {name:<20} {entry['cached_steps']:>8} {entry['steps']:>6} {ratio:>6}")
+
+    report.save(args.report)
+    print(f"\n📊 Timing report written to {args.report}")
+
+    if previous is not None:
+        regressions = compare_reports(
+            report.to_dict(), previous,
+            args.regression_threshold, args.regression_min_seconds
+        )
+        if regressions:
+            print(f"\n🐢 Timing regressions against {args.compare}:")
+            for label, old, new in regressions:
+                print(f"  - {label}: {old:.1f}s → {new:.1f}s (+{(new / old - 1) * 100 if old else 100:.0f}%)")
+        else:
+            print(f"\n✅ No timing regressions against {args.compare}")
 
     # Summary
     print_header("Build Summary")
-    print(f"Total scenarios: {len(SCENARIOS)}")
+    print(f"Total scenarios: {len(scenarios)}")
     print(f"✅ Successful: {success_count}")
+    print(f"⏭️  Unchanged (skipped): {skipped_count}")
     print(f"❌ Failed: {len(failed_scenarios)}")
+    if base:
+        print(f"🧱 Shared base image: {base['ref']} ({graph_results['base']})")
+    cached_steps = sum(entry["cached_steps"] for entry in report.cache.values())
+    total_steps = sum(entry["steps"] for entry in report.cache.values())
+    if total_steps:
+        print(f"🗄️  Layer cache: {cached_steps}/{total_steps} build steps cached "
+              f"({cached_steps / total_steps * 100:.0f}%)")
+    for stage, figures in report.stage_summary().items():
+        rate = "-" if figures["per_minute"] is None else f"{figures['per_minute']:.1f}/min"
+        print(f"⏱️  {stage.capitalize()} throughput: {figures['count']} images in "
+              f"{figures['wall_seconds']:.1f}s wall ({rate}, {figures['busy_seconds']:.1f}s busy)")
+
+    if over_budget:
+        print(f"📦 Over size budget: {', '.join(over_budget)} (see {args.budget_file})")
 
     if failed_scenarios:
+        # The failure may come from a stale builder or login; verify again next run
+        save_prereq_cache("build", None)
         print("\nFailed scenarios:")
         for scenario in failed_scenarios:
             print(f"  - {scenario}")
         sys.exit(1)
+    elif over_budget and args.enforce_budgets:
+        print("\n❌ Images were pushed, but some exceed their size budget")
+        sys.exit(1)
     else:
         print("\n🎉 All images built and pushed successfully!")
         print("\nImages are now available at:")
-        for scenario_name, _ in SCENARIOS:
+        for scenario_name, _ in scenarios:
             print(f"  docker.io/{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}:{VERSION}")
         print("\n✅ Ready to test on Kubernetes!")
 
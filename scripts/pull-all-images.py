@@ -5,9 +5,19 @@ Works on Windows, macOS, Linux - anywhere Python is installed
 Pulls all workshop images from Docker Hub for offline use
 """
 
+import argparse
+import gzip
+import hashlib
+import shutil
+import json
 import subprocess
 import sys
 import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Configuration
@@ -31,15 +41,42 @@ SCENARIOS = [
     "redis",
 ]
 
+# Tags pulled for every scenario
+TAGS = [VERSION, "latest"]
+
+# Stand-in docker CLI put on PATH by --simulate
+SIMULATOR_DIR = Path(__file__).parent / "simulator"
+
+# Validated prerequisites are cached for a short time so repeated runs
+# skip straight to pulling
+PREREQ_CACHE_FILE = Path.home() / ".cache" / "k8s-workshop" / "prerequisites.json"
+PREREQ_CACHE_TTL = 600
+
+# Chunk size used when streaming bundles to and from docker save/load
+BUNDLE_CHUNK_SIZE = 1024 * 1024
+
+# Serializes output from concurrent pull jobs so lines never interleave
+print_lock = threading.Lock()
+
 def print_header(message):
     """Print formatted header"""
     print("\n" + "=" * 60)
     print(f"  {message}")
     print("=" * 60 + "\n")
 
-def run_command(cmd, description):
+def log(message, prefix=None):
+    """Print a message, prefixing every line with the job name if given"""
+    if prefix:
+        message = "\n".join(
+            f"[{prefix}] {line}" if line else line
+            for line in message.split("\n")
+        )
+    with print_lock:
+        print(message, flush=True)
+
+def run_command(cmd, description, prefix=None):
     """Run a shell command and handle errors"""
-    print(f"▶ {description}")
+    log(f"▶ {description}", prefix)
     try:
         result = subprocess.run(
             cmd,
@@ -48,27 +85,67 @@ def run_command(cmd, description):
             capture_output=True,
             text=True
         )
-        print(f"✅ {description} - SUCCESS\n")
+        log(f"✅ {description} - SUCCESS\n", prefix)
         return True
     except subprocess.CalledProcessError as e:
-        print(f"❌ {description} - FAILED")
-        print(f"Error: {e.stderr}\n")
+        log(f"❌ {description} - FAILED\nError: {e.stderr}\n", prefix)
         return False
 
-def check_docker():
-    """Check if Docker is running"""
-    print_header("Checking Prerequisites")
+def format_size(num_bytes):
+    """Format a byte count for humans"""
+    if num_bytes is None:
+        return "?"
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
 
-    # Check Docker
+def enable_simulation():
+    """Put the stand-in docker CLI first on PATH; no daemon or registry is used
+
+    Returns the directory holding the simulated registry and image store.
+    """
+    os.environ["PATH"] = str(SIMULATOR_DIR) + os.pathsep + os.environ.get("PATH", "")
+    if not os.environ.get("SIM_DOCKER_STATE"):
+        os.environ["SIM_DOCKER_STATE"] = tempfile.mkdtemp(prefix="k8s-workshop-sim-")
+    return Path(os.environ["SIM_DOCKER_STATE"])
+
+def load_prereq_cache(key):
+    """Return cached prerequisite results for key if they are still fresh"""
+    try:
+        entry = json.loads(PREREQ_CACHE_FILE.read_text()).get(key)
+    except (OSError, ValueError):
+        return None
+    if not entry or entry.get("docker_host") != os.environ.get("DOCKER_HOST", ""):
+        return None
+    # A different docker binary (e.g. the --simulate stand-in) needs its own checks
+    if entry.get("docker") != shutil.which("docker"):
+        return None
+    if time.time() - entry.get("checked_at", 0) > PREREQ_CACHE_TTL:
+        return None
+    return entry
+
+def save_prereq_cache(key, entry):
+    """Remember validated prerequisites for PREREQ_CACHE_TTL seconds"""
+    try:
+        cache = json.loads(PREREQ_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    cache[key] = dict(entry, checked_at=time.time(), docker_host=os.environ.get("DOCKER_HOST", ""),
+                      docker=shutil.which("docker"))
+    try:
+        PREREQ_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        PREREQ_CACHE_FILE.write_text(json.dumps(cache, indent=2) + "\n")
+    except OSError:
+        pass
+
+def check_docker_running():
+    """Return True if the Docker daemon answers"""
     try:
         subprocess.run(["docker", "version"], capture_output=True, check=True)
-        print("✅ Docker is running")
+        return True
     except:
-        print("❌ Docker is not running or not installed")
-        print("Please start Docker and try again")
-        sys.exit(1)
+        return False
 
-    # Check platform
+def detect_platform():
+    """Return the daemon's os/arch, or None if it cannot be detected"""
     try:
         result = subprocess.run(
             ["docker", "version", "--format", "{{.Server.Os}}/{{.Server.Arch}}"],
@@ -76,55 +153,641 @@ def check_docker():
             text=True,
             check=True
         )
-        platform = result.stdout.strip()
-        print(f"✅ Docker platform: {platform}")
-        print("   (Multi-platform images support linux/amd64 and linux/arm64)")
+        return result.stdout.strip()
     except:
+        return None
+
+def check_docker(use_cache=True):
+    """Check if Docker is running"""
+    print_header("Checking Prerequisites")
+
+    cached = load_prereq_cache("pull") if use_cache else None
+    if cached:
+        age = time.time() - cached["checked_at"]
+        print(f"✅ Prerequisites verified {age:.0f}s ago - using cached result (--recheck to verify again)")
+        print(f"✅ Docker platform: {cached['platform']}")
+        return cached["platform"]
+
+    # Both checks are independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        docker_running = executor.submit(check_docker_running)
+        platform_check = executor.submit(detect_platform)
+
+        # Check Docker
+        if not docker_running.result():
+            print("❌ Docker is not running or not installed")
+            print("Please start Docker and try again")
+            sys.exit(1)
+        print("✅ Docker is running")
+
+        # Check platform
+        platform = platform_check.result()
+
+    if not platform:
         print("⚠️  Could not detect platform, but will continue")
+        return None
+
+    print(f"✅ Docker platform: {platform}")
+    print("   (Multi-platform images support linux/amd64 and linux/arm64)")
+    save_prereq_cache("pull", {"platform": platform})
+    return platform
 
-def pull_image(scenario_name, tag):
+def get_remote_manifest(ref):
+    """Return (digest, manifest) for a remote image reference, or (None, None)"""
+    try:
+        result = subprocess.run(
+            ["docker", "buildx", "imagetools", "inspect", "--raw", ref],
+            capture_output=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+    # The registry digest is the SHA-256 of the raw manifest bytes
+    raw = result.stdout.strip()
+    try:
+        manifest = json.loads(raw)
+    except ValueError:
+        return None, None
+    return "sha256:" + hashlib.sha256(raw).hexdigest(), manifest
+
+def get_local_digests(ref):
+    """Return the registry digests of the local image tagged as ref"""
+    try:
+        result = subprocess.run(
+            ["docker", "image", "inspect", "--format", "{{json .RepoDigests}}", ref],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        repo_digests = json.loads(result.stdout.strip() or "[]") or []
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return set()
+    return {repo_digest.split("@", 1)[1] for repo_digest in repo_digests if "@" in repo_digest}
+
+def get_download_size(repo, manifest, platform):
+    """Compressed size of the layers Docker downloads for this platform"""
+    if manifest.get("manifests"):
+        # Multi-platform index: pick the entry matching the local daemon
+        os_name, _, arch = (platform or "linux/amd64").partition("/")
+        matches = [
+            entry for entry in manifest["manifests"]
+            if entry.get("platform", {}).get("os") == os_name
+            and entry.get("platform", {}).get("architecture") == arch
+        ]
+        if not matches:
+            return None
+        _, manifest = get_remote_manifest(f"{repo}@{matches[0]['digest']}")
+        if not manifest:
+            return None
+
+    layers = manifest.get("layers", [])
+    return sum(layer.get("size", 0) for layer in layers) + manifest.get("config", {}).get("size", 0)
+
+def resolve_image(scenario_name, platform):
+    """Work out which tags of a scenario are stale and which digest they need"""
+    repo = f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}"
+    plan = {"scenario": scenario_name, "repo": repo, "digests": {}, "unresolved": [], "current": []}
+
+    for tag in TAGS:
+        ref = f"{repo}:{tag}"
+        digest, manifest = get_remote_manifest(ref)
+        if not digest:
+            # Registry lookup failed - fall back to a plain pull of this tag
+            plan["unresolved"].append(tag)
+        elif digest in get_local_digests(ref):
+            plan["current"].append(tag)
+        else:
+            entry = plan["digests"].setdefault(digest, {"tags": [], "manifest": manifest})
+            entry["tags"].append(tag)
+
+    # Only fetch sizes for digests that will actually be downloaded
+    for entry in plan["digests"].values():
+        entry["size"] = get_download_size(repo, entry.pop("manifest"), platform)
+
+    return plan
+
+def pull_image(scenario_name, tag, prefix=None):
     """Pull a Docker image from Docker Hub"""
     image_name = f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}:{tag}"
     pull_cmd = f'docker pull "{image_name}"'
 
-    return run_command(pull_cmd, f"Pulling {scenario_name}:{tag}")
+    return run_command(pull_cmd, f"Pulling {scenario_name}:{tag}", prefix)
+
+def pull_digest(scenario_name, repo, digest, tags, prefix=None):
+    """Pull one digest once, then tag it locally under every name that needs it"""
+    if not run_command(f'docker pull "{repo}@{digest}"', f"Pulling {scenario_name}@{digest[:19]}", prefix):
+        return False
+
+    for tag in tags:
+        if not run_command(f'docker tag "{repo}@{digest}" "{repo}:{tag}"', f"Tagging {scenario_name}:{tag}", prefix):
+            return False
+    return True
+
+def pull_scenario(plan, prefix=None):
+    """Bring every tag of one scenario up to date; returns per-tag results"""
+    scenario_name = plan["scenario"]
+    results = []
+
+    for tag in plan["current"]:
+        log(f"✅ {scenario_name}:{tag} is already up to date", prefix)
+        results.append({"tag": tag, "ok": True, "action": "up-to-date", "bytes": 0, "seconds": 0.0})
+
+    for digest, entry in plan["digests"].items():
+        start = time.monotonic()
+        ok = pull_digest(scenario_name, plan["repo"], digest, entry["tags"], prefix)
+        elapsed = time.monotonic() - start
+        for i, tag in enumerate(entry["tags"]):
+            # Only the first tag costs a download; the rest are local tags
+            results.append({
+                "tag": tag,
+                "ok": ok,
+                "action": "pulled" if i == 0 else "tagged",
+                "bytes": entry["size"] if i == 0 else 0,
+                "seconds": elapsed if i == 0 else 0.0,
+            })
+
+    for tag in plan["unresolved"]:
+        start = time.monotonic()
+        ok = pull_image(scenario_name, tag, prefix)
+        results.append({"tag": tag, "ok": ok, "action": "pulled", "bytes": None, "seconds": time.monotonic() - start})
+
+    return results
+
+def get_local_image_size(ref):
+    """Return the uncompressed size of a local image, or None if missing"""
+    try:
+        result = subprocess.run(
+            ["docker", "image", "inspect", "--format", "{{.Size}}", ref],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return int(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+def export_bundle(bundle_path):
+    """Save every local workshop image into one compressed, layer-deduplicated archive"""
+    print_header("Exporting Offline Bundle")
+
+    refs = []
+    images_size = 0
+    for scenario_name in SCENARIOS:
+        for tag in TAGS:
+            ref = f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}:{tag}"
+            size = get_local_image_size(ref)
+            if size is None:
+                print(f"⚠️  {ref} is not present locally - skipping")
+                continue
+            refs.append(ref)
+            # Both tags normally share one image; count its size once
+            if tag == VERSION:
+                images_size += size
+
+    if not refs:
+        print("❌ No workshop images found locally. Run this script without --export first.")
+        return False
+
+    bundle_path = Path(bundle_path)
+    tmp_path = bundle_path.with_name(bundle_path.name + ".partial")
+    compress = bundle_path.suffix in (".gz", ".tgz")
+
+    # A single `docker save` of all images stores each shared layer
+    # (python:3.11-alpine, the flask install, ...) exactly once
+    print(f"▶ Saving {len(refs)} image tags to {bundle_path}")
+    start = time.monotonic()
+    tar_bytes = 0
+    process = subprocess.Popen(["docker", "save", *refs], stdout=subprocess.PIPE)
+    try:
+        opener = gzip.open if compress else open
+        with opener(tmp_path, "wb") as out:
+            while True:
+                chunk = process.stdout.read(BUNDLE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                tar_bytes += len(chunk)
+                out.write(chunk)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        print("❌ docker save failed")
+        return False
+
+    os.replace(tmp_path, bundle_path)
+    bundle_size = bundle_path.stat().st_size
+    elapsed = time.monotonic() - start
+
+    print(f"✅ Bundle written in {elapsed:.1f}s")
+    print(f"   Images (sum of individual sizes): {format_size(images_size)}")
+    print(f"   Deduplicated archive (tar):       {format_size(tar_bytes)}")
+    print(f"   Bundle on disk:                   {format_size(bundle_size)}")
+    print(f"\nTo load on another machine: ./scripts/pull-all-images.py --import {bundle_path.name}")
+    return True
+
+def import_bundle(bundle_path):
+    """Stream a bundle created by --export into docker load"""
+    print_header("Importing Offline Bundle")
+
+    bundle_path = Path(bundle_path)
+    if not bundle_path.exists():
+        print(f"❌ Bundle not found: {bundle_path}")
+        return False
+
+    with open(bundle_path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+
+    print(f"▶ Loading images from {bundle_path} ({format_size(bundle_path.stat().st_size)})")
+    start = time.monotonic()
+    process = subprocess.Popen(["docker", "load"], stdin=subprocess.PIPE)
+    try:
+        opener = gzip.open if compressed else open
+        with opener(bundle_path, "rb") as bundle:
+            shutil.copyfileobj(bundle, process.stdin, BUNDLE_CHUNK_SIZE)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = process.wait()
+
+    if returncode != 0:
+        print("❌ docker load failed")
+        return False
+
+    print(f"✅ Bundle loaded in {time.monotonic() - start:.1f}s")
+    print("\nTo verify, run: docker images | grep k8s-masterclass")
+    return True
+
+def get_local_image_id(ref):
+    """Return the image ID of a local image, or None if missing"""
+    try:
+        result = subprocess.run(
+            ["docker", "image", "inspect", "--format", "{{.Id}}", ref],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def list_cluster_names(tool):
+    """Return the kind clusters or minikube profiles that exist locally"""
+    if not shutil.which(tool):
+        return []
+    try:
+        if tool == "kind":
+            result = subprocess.run(["kind", "get", "clusters"], capture_output=True, text=True, check=True)
+            return result.stdout.split()
+        result = subprocess.run(["minikube", "profile", "list", "-o", "json"], capture_output=True, text=True)
+        return [profile["Name"] for profile in json.loads(result.stdout or "{}").get("valid", [])]
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+        return []
+
+def resolve_cluster(spec):
+    """Turn "kind:NAME", "minikube:PROFILE" or a bare name into a cluster description"""
+    tool, _, name = spec.rpartition(":")
+    if not tool:
+        # Bare name: whichever tool knows a cluster by that name
+        tool = next((t for t in ("kind", "minikube") if name in list_cluster_names(t)), None)
+        if not tool:
+            print(f"❌ No kind cluster or minikube profile named '{name}'")
+            return None
+    if tool not in ("kind", "minikube"):
+        print(f"❌ Unknown cluster type '{tool}' (use kind:NAME or minikube:PROFILE)")
+        return None
+    if not shutil.which(tool):
+        print(f"❌ {tool} is not installed")
+        return None
+
+    try:
+        if tool == "kind":
+            result = subprocess.run(["kind", "get", "nodes", "--name", name], capture_output=True, text=True, check=True)
+            nodes = result.stdout.split()
+        else:
+            result = subprocess.run(["minikube", "-p", name, "node", "list"], capture_output=True, text=True, check=True)
+            nodes = [line.split()[0] for line in result.stdout.splitlines() if line.strip()]
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ Could not list the nodes of {tool} cluster '{name}': {getattr(e, 'stderr', e)}")
+        return None
+    if not nodes:
+        print(f"❌ {tool} cluster '{name}' has no nodes - is it running?")
+        return None
+
+    cluster = {"tool": tool, "name": name, "nodes": nodes, "runtime": "containerd"}
+    if tool == "minikube":
+        # minikube defaults to the docker runtime; kind nodes always run containerd
+        try:
+            result = subprocess.run(node_command(cluster, nodes[0], "crictl", "version"),
+                                    capture_output=True, text=True, check=True)
+            for line in result.stdout.splitlines():
+                if line.startswith("RuntimeName:"):
+                    cluster["runtime"] = line.split(":", 1)[1].strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    return cluster
+
+def node_command(cluster, node, *cmd):
+    """Command line running cmd as root on one cluster node"""
+    if cluster["tool"] == "kind":
+        return ["docker", "exec", "--privileged", "-i", node, *cmd]
+    return ["minikube", "-p", cluster["name"], "ssh", "-n", node, "--", "sudo", *cmd]
+
+def node_load_command(cluster, node):
+    """Command line that imports a `docker save` archive from stdin on a node"""
+    if cluster["runtime"] == "docker":
+        return node_command(cluster, node, "docker", "load")
+    if cluster["runtime"] in ("cri-o", "crio"):
+        return node_command(cluster, node, "podman", "load")
+    return node_command(cluster, node, "ctr", "--namespace=k8s.io", "images", "import", "--digests", "-")
+
+def get_node_images(cluster, node):
+    """Return {image ID: set of tags} for the images already on a node, or None"""
+    try:
+        result = subprocess.run(node_command(cluster, node, "crictl", "images", "-o", "json"),
+                                capture_output=True, text=True, check=True)
+        images = json.loads(result.stdout).get("images", [])
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+    return {image["id"]: set(image.get("repoTags") or []) for image in images}
+
+def qualified_ref(ref):
+    """Fully qualified form of a Docker Hub reference, as the node runtimes list it"""
+    return f"docker.io/{ref}"
+
+def stream_to_node(cluster, node, chunks):
+    """Feed archive chunks from a queue into one node's image import"""
+    start = time.monotonic()
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(node_load_command(cluster, node), stdin=subprocess.PIPE,
+                                       stdout=subprocess.DEVNULL, stderr=errors)
+        except OSError as e:
+            # Returning ends this consumer; the reader then stops feeding it
+            return {"ok": False, "seconds": time.monotonic() - start, "bytes": 0,
+                    "error": f"could not start the image import: {e}"}
+        sent = 0
+        broken = False
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if broken:
+                # Keep draining so the reader is never blocked by this node
+                continue
+            try:
+                process.stdin.write(chunk)
+                sent += len(chunk)
+            except (BrokenPipeError, OSError):
+                broken = True
+        try:
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        returncode = process.wait()
+        errors.seek(0)
+        error = errors.read().decode(errors="replace").strip()
+    return {"ok": returncode == 0 and not broken, "seconds": time.monotonic() - start, "bytes": sent, "error": error}
+
+def feed(chunks, item, consumer):
+    """Put item on a node's queue, unless the consumer reading it has already finished"""
+    while not consumer.done():
+        try:
+            chunks.put(item, timeout=1)
+            return
+        except queue.Full:
+            pass
+
+def load_image_into_nodes(cluster, scenario_name, refs, targets, prefix=None):
+    """Run one `docker save` of refs and stream it into every target node at once"""
+    log(f"▶ Loading {scenario_name} into {len(targets)} node(s): {', '.join(targets)}", prefix)
+    queues = {node: queue.Queue(maxsize=8) for node in targets}
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = {node: executor.submit(stream_to_node, cluster, node, queues[node]) for node in targets}
+        save_ok = False
+        try:
+            process = subprocess.Popen(["docker", "save", *refs], stdout=subprocess.PIPE)
+            try:
+                # Stop reading once no node is left to take the archive
+                while not all(future.done() for future in futures.values()):
+                    chunk = process.stdout.read(BUNDLE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    for node, chunks in queues.items():
+                        feed(chunks, chunk, futures[node])
+            finally:
+                process.stdout.close()
+                save_ok = process.wait() == 0
+        finally:
+            for node, chunks in queues.items():
+                feed(chunks, None, futures[node])
+        results = {node: future.result() for node, future in futures.items()}
+
+    for node, result in results.items():
+        result["ok"] = result["ok"] and save_ok
+        if result["ok"]:
+            log(f"✅ {node}: loaded {format_size(result['bytes'])} in {result['seconds']:.1f}s", prefix)
+        else:
+            reason = result["error"] or ("docker save failed" if not save_ok else "import failed")
+            log(f"❌ {node}: load FAILED\nError: {reason}", prefix)
+    return results
+
+def load_into_cluster(spec, jobs):
+    """Preload every local workshop image into all nodes of a kind/minikube cluster"""
+    print_header(f"Loading Images into {spec}")
+
+    cluster = resolve_cluster(spec)
+    if not cluster:
+        return False
+    nodes = cluster["nodes"]
+    print(f"Cluster: {cluster['tool']} '{cluster['name']}' ({cluster['runtime']})")
+    print(f"Nodes: {', '.join(nodes)}\n")
+
+    # Inventory every node up front so images already present are skipped
+    with ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+        inventories = dict(zip(nodes, executor.map(lambda node: get_node_images(cluster, node), nodes)))
+    for node, inventory in inventories.items():
+        if inventory is None:
+            print(f"⚠️  Could not list images on {node} - loading everything into it")
+
+    # Tags sharing an image ID travel in one archive
+    work = []
+    for scenario_name in SCENARIOS:
+        groups = {}
+        for tag in TAGS:
+            ref = f"{DOCKER_USER}/{REPO_PREFIX}-{scenario_name}:{tag}"
+            image_id = get_local_image_id(ref)
+            if image_id:
+                groups.setdefault(image_id, []).append(ref)
+        if not groups:
+            print(f"⚠️  {scenario_name} is not present locally - skipping")
+        for image_id, refs in groups.items():
+            wanted = {qualified_ref(ref) for ref in refs}
+            targets = [
+                node for node in nodes
+                if not wanted <= (inventories[node] or {}).get(image_id, set())
+            ]
+            work.append((scenario_name, image_id, refs, targets))
+
+    stats = {node: {"loaded": 0, "skipped": 0, "failed": 0, "bytes": 0, "seconds": 0.0} for node in nodes}
+
+    def load_one(item):
+        scenario_name, image_id, refs, targets = item
+        skipped = [node for node in nodes if node not in targets]
+        if skipped:
+            where = "every node" if not targets else ", ".join(skipped)
+            log(f"⏭️  {image_id[:19]} already on {where} - skipping", scenario_name)
+        if not targets:
+            return {}
+        return load_image_into_nodes(cluster, scenario_name, refs, targets, scenario_name)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        all_results = list(executor.map(load_one, work))
+    elapsed = time.monotonic() - start
+
+    for (scenario_name, image_id, refs, targets), results in zip(work, all_results):
+        for node in nodes:
+            if node not in results:
+                stats[node]["skipped"] += 1
+                continue
+            result = results[node]
+            stats[node]["loaded" if result["ok"] else "failed"] += 1
+            stats[node]["bytes"] += result["bytes"]
+            stats[node]["seconds"] += result["seconds"]
+
+    # Per-node report; Busy is the sum of that node's imports, which overlap
+    print_header("Node Load Report")
+    print(f"{'Node':<32} {'Loaded':>7} {'Skipped':>8} {'Failed':>7} {'Streamed':>10} {'Busy':>8}")
+    for node in nodes:
+        s = stats[node]
+        print(f"{node:<32} {s['loaded']:>7} {s['skipped']:>8} {s['failed']:>7} "
+              f"{format_size(s['bytes']):>10} {s['seconds']:>7.1f}s")
+    print(f"\nWall time: {elapsed:.1f}s for {len(work)} image(s) across {len(nodes)} node(s)")
+
+    failed = sum(s["failed"] for s in stats.values())
+    if failed:
+        print(f"❌ {failed} node load(s) failed")
+        return False
+    print(f"✅ All workshop images are present on every node of {spec}")
+    return True
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Pull all K8s Workshop images from Docker Hub"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=4,
+        help="number of images to pull concurrently (default: 4)"
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="use the stand-in docker CLI from scripts/simulator (no daemon or registry needed)"
+    )
+    parser.add_argument(
+        "--recheck",
+        action="store_true",
+        help=f"ignore cached prerequisite checks (cached for {PREREQ_CACHE_TTL // 60} minutes)"
+    )
+    bundle = parser.add_mutually_exclusive_group()
+    bundle.add_argument(
+        "--export",
+        metavar="BUNDLE",
+        help="write all local workshop images to one offline bundle (.tar.gz or .tar)"
+    )
+    bundle.add_argument(
+        "--import",
+        dest="import_bundle",
+        metavar="BUNDLE",
+        help="load workshop images from an offline bundle instead of Docker Hub"
+    )
+    parser.add_argument(
+        "--load-into",
+        metavar="CLUSTER",
+        help="afterwards, load the images into every node of a kind cluster or minikube profile "
+             "(NAME, kind:NAME or minikube:PROFILE)"
+    )
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.export and args.load_into:
+        parser.error("--load-into cannot be combined with --export")
+    return args
 
 def main():
     """Main pull workflow"""
+    args = parse_args()
+    if args.simulate:
+        sim_dir = enable_simulation()
+
     print_header("K8s Workshop - Pull All Images")
     print(f"Docker User: {DOCKER_USER}")
     print(f"Version: {VERSION}")
     print(f"Total Images: {len(SCENARIOS)}")
     print("\nℹ️  All images are multi-platform (linux/amd64, linux/arm64)")
     print("   Docker will automatically pull the correct version for your system\n")
+    if args.simulate:
+        print(f"🧪 SIMULATION: using {SIMULATOR_DIR / 'docker'} (state in {sim_dir})\n")
 
     # Check prerequisites
-    check_docker()
+    platform = check_docker(use_cache=not args.recheck)
+
+    # Offline bundle modes don't touch Docker Hub
+    if args.export:
+        sys.exit(0 if export_bundle(args.export) else 1)
+    if args.import_bundle:
+        if not import_bundle(args.import_bundle):
+            sys.exit(1)
+        if args.load_into:
+            sys.exit(0 if load_into_cluster(args.load_into, args.jobs) else 1)
+        sys.exit(0)
+
+    # Compare remote digests with what is already present locally, so each
+    # unique digest is downloaded once and up-to-date tags are skipped
+    print_header("Resolving Image Digests")
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        plans = list(executor.map(lambda name: resolve_image(name, platform), SCENARIOS))
+
+    downloads = sum(len(plan["digests"]) + len(plan["unresolved"]) for plan in plans)
+    print(f"Unique downloads needed: {downloads} (of {len(SCENARIOS) * len(TAGS)} tags)")
 
     # Pull all images
     print_header("Pulling Images from Docker Hub")
 
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(pull_scenario, plan, plan["scenario"]) for plan in plans]
+        results = [future.result() for future in futures]
+
     success_count = 0
     failed_scenarios = []
+    for scenario_name, tag_results in zip(SCENARIOS, results):
+        failed = [f"{scenario_name}:{r['tag']}" for r in tag_results if not r["ok"]]
+        failed_scenarios.extend(failed)
+        if not failed:
+            success_count += 1
 
-    for idx, scenario_name in enumerate(SCENARIOS, 1):
-        print(f"\n[{idx}/{len(SCENARIOS)}] Processing: {scenario_name}")
-        print("-" * 60)
-
-        # Pull v1.0 tag
-        if not pull_image(scenario_name, VERSION):
-            failed_scenarios.append(f"{scenario_name}:{VERSION}")
-            print(f"⚠️  Failed to pull {scenario_name}:{VERSION}\n")
-            # Continue to try latest tag
-
-        # Pull latest tag
-        if not pull_image(scenario_name, "latest"):
-            failed_scenarios.append(f"{scenario_name}:latest")
-            print(f"⚠️  Failed to pull {scenario_name}:latest\n")
-            continue
-
-        success_count += 1
-        print(f"✅ Successfully pulled {scenario_name}\n")
+    # Per-image transfer report
+    print_header("Transfer Report")
+    print(f"{'Image':<28} {'Action':<12} {'Download':>10} {'Time':>8}")
+    total_bytes = 0
+    for scenario_name, tag_results in zip(SCENARIOS, results):
+        for r in sorted(tag_results, key=lambda r: TAGS.index(r["tag"])):
+            action = r["action"] if r["ok"] else "FAILED"
+            print(f"{scenario_name + ':' + r['tag']:<28} {action:<12} "
+                  f"{format_size(r['bytes']):>10} {r['seconds']:>7.1f}s")
+            total_bytes += r["bytes"] or 0
+    print(f"\nTotal downloaded (compressed, at most): {format_size(total_bytes)}")
 
     # Summary
     print_header("Pull Summary")
@@ -142,7 +805,6 @@ def main():
         print("  2. Network connectivity issues")
         print("  3. Images not built with multi-platform support")
         print("\nℹ️  Run build-and-push-all.py to build and push images")
-        sys.exit(1)
     else:
         print("\n🎉 All images pulled successfully!")
         print("\nImages are now available locally:")
@@ -151,6 +813,11 @@ def main():
         print("\n✅ Ready to use with Kubernetes!")
         print("\nTo verify, run: docker images | grep k8s-masterclass")
 
+    # Images that did pull are still worth preloading
+    loaded = load_into_cluster(args.load_into, args.jobs) if args.load_into else True
+    if failed_scenarios or not loaded:
+        sys.exit(1)
+
 if __name__ == "__main__":
     try:
         main()